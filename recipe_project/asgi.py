@@ -13,4 +13,7 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'recipe_project.settings')
 
-application = get_asgi_application()
+# the chart render workers start with the server rather than on the first search
+from recipes.chart_pool import PoolLifespan  # noqa: E402
+
+application = PoolLifespan(get_asgi_application())
@@ -44,13 +44,19 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # recipe_project-related apps
     'recipes',
 ]
 
 MIDDLEWARE = [
+    # first, so its total covers the rest of the chain; inactive unless REQUEST_TIMING
+    'recipes.middleware.ServerTimingMiddleware',
+    # inactive unless PROFILING_SAMPLE_RATE or PROFILING_SLOW_MS is set
+    'recipes.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise, able to run on the event loop like the rest of the chain
+    'recipes.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,6 +65,20 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# per-request database, chart and template timings in Server-Timing headers and
+# "recipes.timing" log lines, see recipes/middleware.py
+REQUEST_TIMING = os.environ.get('REQUEST_TIMING', '').lower() in ('1', 'true', 'yes')
+
+# request profiles for manage.py summarize_profiles, see recipes/middleware.py:
+# cProfile for this fraction of requests (0.01 is 1%), stack samples every
+# PROFILING_INTERVAL_MS kept for requests slower than PROFILING_SLOW_MS (0 is off);
+# only the newest PROFILING_MAX_FILES profiles are kept
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_SLOW_MS = int(os.environ.get('PROFILING_SLOW_MS', 0))
+PROFILING_INTERVAL_MS = int(os.environ.get('PROFILING_INTERVAL_MS', 5))
+PROFILING_DIR = Path(os.environ.get('PROFILING_DIR', BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', 200))
+
 ROOT_URLCONF = 'recipe_project.urls'
 
 TEMPLATES = [
@@ -95,6 +115,79 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# sessions and logged-in users are only cached in a cache every web process
+# shares: Redis at REDIS_URL (set by Heroku Data for Redis), or any backend given
+# as SESSION_CACHE_BACKEND and SESSION_CACHE_LOCATION, e.g. Memcached. In a
+# per-process cache a logout or deactivation wouldn't reach the other workers,
+# see recipes/checks.py; without a shared cache both are read from the database
+REDIS_URL = os.environ.get('REDIS_URL', '')
+SESSION_CACHE_BACKEND = os.environ.get(
+    'SESSION_CACHE_BACKEND',
+    'django.core.cache.backends.redis.RedisCache' if REDIS_URL else '',
+)
+SESSION_CACHE_LOCATION = os.environ.get('SESSION_CACHE_LOCATION', REDIS_URL)
+
+# LocMemCache evicts least recently used entries once MAX_ENTRIES is reached;
+# point CHART_CACHE_BACKEND at FileBasedCache to share charts between workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'charts': {
+        'BACKEND': os.environ.get('CHART_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CHART_CACHE_LOCATION', 'recipe-charts'),
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CHART_CACHE_MAX_ENTRIES', 300)),
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    # sessions and logged-in users, see SESSION_CACHE_BACKEND above; without a
+    # shared cache only logouts and user changes reach it, and it stores nothing
+    'sessions': {
+        'BACKEND': SESSION_CACHE_BACKEND or 'django.core.cache.backends.dummy.DummyCache',
+        'LOCATION': SESSION_CACHE_LOCATION,
+        # Heroku's Redis serves TLS with a self-signed certificate
+        'OPTIONS': {'ssl_cert_reqs': None} if SESSION_CACHE_LOCATION.startswith('rediss://') else {},
+    },
+    # rendered pages, see recipes/views.py; use a shared backend with several workers
+    'views': {
+        'BACKEND': os.environ.get('VIEW_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('VIEW_CACHE_LOCATION', 'recipe-views'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('VIEW_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+}
+
+CHART_CACHE_ALIAS = 'charts'
+
+SESSION_CACHE_ALIAS = 'sessions'
+if SESSION_CACHE_BACKEND:
+    # sessions are read from the cache and written through to the database, and
+    # the user behind them is cached too, so logged-in page views skip both
+    # queries; ModelBackend stays listed for sessions logged in before the cache
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = [
+        'recipes.backends.CachedModelBackend',
+        'django.contrib.auth.backends.ModelBackend',
+    ]
+# seconds a logged-in user stays cached; changes to the user invalidate it sooner
+USER_CACHE_TIMEOUT = int(os.environ.get('USER_CACHE_TIMEOUT', 60 * 5))
+
+# worker processes rendering charts, per web process (0 renders in the web
+# process itself), and how many renders may wait for one before the async
+# chart view answers 503
+CHART_POOL_WORKERS = int(os.environ.get('CHART_POOL_WORKERS', 2))
+CHART_POOL_MAX_PENDING = int(os.environ.get('CHART_POOL_MAX_PENDING', 16))
+VIEW_CACHE_ALIAS = 'views'
+# seconds a rendered page stays cached
+VIEW_CACHE_TIMEOUT = int(os.environ.get('VIEW_CACHE_TIMEOUT', 60 * 10))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -147,23 +240,33 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # AUTH
 LOGIN_URL = '/login/'
 
+# soak tests only run when asked for with manage.py test --tag soak
+TEST_RUNNER = 'recipe_project.test_runner.TestRunner'
+
 # Heroku: Update database configuration from $DATABASE_URL.
 import dj_database_url
 db_from_env = dj_database_url.config(conn_max_age=500)
 DATABASES['default'].update(db_from_env)
 
 #Configure logging
+# INFO and up by default, LOG_LEVEL=DEBUG for everything; libraries that are
+# chatty at DEBUG stay at WARNING either way
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
         'console': {
-            'level': 'DEBUG',
             'class': 'logging.StreamHandler',
         },
     },
     'root': {
         'handlers': ['console'],
-        'level': 'DEBUG',
+        'level': LOG_LEVEL,
     },
-}
\ No newline at end of file
+    'loggers': {
+        'matplotlib': {'level': 'WARNING'},
+        'PIL': {'level': 'WARNING'},
+        'asyncio': {'level': 'WARNING'},
+    },
+}
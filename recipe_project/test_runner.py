@@ -0,0 +1,10 @@
+from django.test.runner import DiscoverRunner
+
+
+# leaves out the slow "soak" tests unless tags are asked for, e.g.
+# manage.py test --tag soak
+class TestRunner(DiscoverRunner):
+    def __init__(self, *args, tags=None, exclude_tags=None, **kwargs):
+        if not tags:
+            exclude_tags = {*(exclude_tags or ()), "soak"}
+        super().__init__(*args, tags=tags, exclude_tags=exclude_tags, **kwargs)
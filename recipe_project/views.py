@@ -6,6 +6,8 @@ from django.contrib.auth import authenticate, login, logout
 # Django Form for authentication
 from django.contrib.auth.forms import AuthenticationForm
 
+from recipes.utils import invalidate_cached_user
+
 
 # define a function view called login_view that takes a request from user
 def login_view(request):
@@ -47,7 +49,13 @@ def login_view(request):
 
 # define a function view called logout_view that takes a request from user
 def logout_view(request):
-    logout(request)  # the use pre-defined Django function to logout
+    user_id = request.user.pk
+    # the use pre-defined Django function to logout; it also deletes the
+    # session from the session cache and the database
+    logout(request)
+    # and the user's cached copy, see recipes/backends.py
+    if user_id is not None:
+        invalidate_cached_user(user_id)
     return render(
         request, "auth/success.html"
     )  # after logging out go to login form (or whichever page you want)
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Recipe
+from .models import Recipe, Ingredient, RecipeStatistic, Job
 
 # Register your models here.
-admin.site.register(Recipe)
\ No newline at end of file
+admin.site.register(Recipe)
+admin.site.register(Ingredient)
+admin.site.register(RecipeStatistic)
+admin.site.register(Job)
@@ -0,0 +1,31 @@
+# pandas is imported inside these functions so only analytics requests pay for it
+
+# columns loaded for analytics, straight from the database without model instances
+ANALYTICS_COLUMNS = [
+    "id",
+    "name",
+    "cooking_time",
+    "difficulty",
+    "number_of_ingredients",
+]
+
+
+# converts a recipe queryset to a pandas DataFrame
+def recipes_dataframe(queryset):
+    import pandas as pd
+
+    rows = queryset.values_list(*ANALYTICS_COLUMNS)
+    return pd.DataFrame.from_records(list(rows), columns=ANALYTICS_COLUMNS)
+
+
+# summary statistics of a recipe queryset, one row per difficulty
+def recipes_summary(queryset):
+    recipes_df = recipes_dataframe(queryset)
+    summary = recipes_df.groupby("difficulty").agg(
+        recipes=("id", "count"),
+        mean_cooking_time=("cooking_time", "mean"),
+        min_cooking_time=("cooking_time", "min"),
+        max_cooking_time=("cooking_time", "max"),
+        mean_number_of_ingredients=("number_of_ingredients", "mean"),
+    )
+    return summary.round(2)
@@ -0,0 +1,190 @@
+import hashlib
+from functools import wraps
+
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .forms import RecipesSearchForm
+from .models import Recipe
+from .pagination import keyset_paginate
+
+# field name in the API: (columns it reads, function turning a recipe into its value)
+API_FIELDS = {
+    "id": (["id"], lambda recipe: recipe.pk),
+    "name": (["name"], lambda recipe: recipe.name),
+    "ingredients": (["ingredients"], lambda recipe: recipe.ingredients),
+    "cooking_time": (["cooking_time"], lambda recipe: recipe.cooking_time),
+    "difficulty": (["difficulty"], lambda recipe: recipe.difficulty),
+    "number_of_ingredients": (
+        ["number_of_ingredients"],
+        lambda recipe: recipe.number_of_ingredients,
+    ),
+    "pic": (["pic"], lambda recipe: recipe.pic.url if recipe.pic else None),
+    "pic_thumbnail": (
+        ["pic_thumbnail"],
+        lambda recipe: recipe.pic_thumbnail.url if recipe.pic_thumbnail else None,
+    ),
+    "updated_at": (["updated_at"], lambda recipe: recipe.updated_at.isoformat()),
+    "url": (["id"], lambda recipe: recipe.get_absolute_url()),
+}
+DEFAULT_FIELDS = ["id", "name", "cooking_time", "difficulty", "url"]
+
+# list and search pages seek on the same unique, indexed ordering as the HTML list
+API_ORDERING = ("name", "id")
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def error_response(message, status):
+    return JsonResponse({"error": message}, status=status)
+
+
+# session login like the HTML views, but a JSON 401 instead of a login redirect;
+# ApiError raised by the view becomes a JSON error response
+def api_view(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error_response("Authentication required", 401)
+        if request.method not in ("GET", "HEAD"):
+            return error_response("Method not allowed", 405)
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return error_response(str(error), error.status)
+
+    return wrapper
+
+
+# the fields requested with ?fields=a,b, in the order given
+def selected_fields(request):
+    requested = request.GET.get("fields")
+    if not requested:
+        return DEFAULT_FIELDS
+    fields = [field.strip() for field in requested.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in API_FIELDS]
+    if unknown or not fields:
+        raise ApiError(f"Unknown fields: {', '.join(unknown) or requested}")
+    return fields
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get("page_size", API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError("page_size must be a number")
+    return max(1, min(size, API_MAX_PAGE_SIZE))
+
+
+# reads only the columns behind the selected fields, plus the ordering columns
+def only_fields(queryset, fields):
+    columns = {column for field in fields for column in API_FIELDS[field][0]}
+    return queryset.only(*columns, *API_ORDERING)
+
+
+def serialize(recipe, fields):
+    return {field: API_FIELDS[field][1](recipe) for field in fields}
+
+
+# answers from a version stamp before any serializing: the ETag covers the
+# request's query string, so different pages or fields never share one
+def conditional_json(request, last_modified, version, build):
+    digest = hashlib.sha256(
+        f"{version}|{request.get_full_path()}".encode("utf-8")
+    ).hexdigest()[:32]
+    etag = f'"{digest}"'
+    timestamp = last_modified.timestamp() if last_modified else None
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp and int(timestamp)
+    )
+    if response is None:
+        response = JsonResponse(build())
+    response["ETag"] = etag
+    if timestamp:
+        response["Last-Modified"] = http_date(timestamp)
+    # clients may keep responses but must revalidate them on every poll
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# a page of recipes with links to its neighbours; the version comes from the
+# page's own rows, so a revalidation costs the same index seek as the page
+def recipe_page(request, queryset):
+    fields = selected_fields(request)
+    size = page_size(request)
+
+    try:
+        page = keyset_paginate(
+            only_fields(queryset, [*fields, "updated_at"]),
+            API_ORDERING,
+            size,
+            after=request.GET.get("after"),
+            before=request.GET.get("before"),
+        )
+    except ValueError:
+        raise ApiError("Invalid page cursor")
+
+    # an edit, insert or delete that reaches this page changes its rows or its
+    # links; the page has an ETag but no Last-Modified, as a delete moves no
+    # timestamp and If-Modified-Since would answer 304
+    rows = [(recipe.pk, recipe.updated_at) for recipe in page.object_list]
+    version = f"{rows}|{page.next_cursor}|{page.previous_cursor}"
+
+    def build():
+        return {
+            "results": [serialize(recipe, fields) for recipe in page.object_list],
+            "next": page_link(request, "after", page.next_cursor),
+            "previous": page_link(request, "before", page.previous_cursor),
+        }
+
+    return conditional_json(request, None, version, build)
+
+
+# the current URL with its cursor swapped for the given one
+def page_link(request, direction, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query.pop("after", None)
+    query.pop("before", None)
+    query[direction] = cursor
+    return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+
+@api_view
+def recipe_list(request):
+    return recipe_page(request, Recipe.objects.all())
+
+
+@api_view
+def recipe_detail(request, pk):
+    fields = selected_fields(request)
+    last_modified = (
+        Recipe.objects.filter(pk=pk).values_list("updated_at", flat=True).first()
+    )
+    if last_modified is None:
+        raise ApiError("Recipe not found", status=404)
+
+    def build():
+        recipe = only_fields(Recipe.objects.all(), fields).get(pk=pk)
+        return serialize(recipe, fields)
+
+    return conditional_json(request, last_modified, last_modified, build)
+
+
+# same criteria as the search page, given in the query string; results are in
+# name order so they can be paged by cursor, full-text rank isn't kept
+@api_view
+def recipe_search(request):
+    form = RecipesSearchForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors.get_json_data()}, status=400)
+    return recipe_page(request, form.get_queryset())
@@ -0,0 +1,19 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .utils import USER_CACHE_TIMEOUT, get_user_cache, user_cache_key
+
+
+# ModelBackend that keeps users looked up from the session in the cache, so
+# authenticated requests skip the user query; saving or deleting a user and
+# logging out drop the cached copy, see recipes/signals.py and logout_view, but
+# User.objects.filter(...).update() doesn't
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        cache = get_user_cache()
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
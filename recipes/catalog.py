@@ -0,0 +1,83 @@
+import random
+
+from .imports import batched, save_batch
+from .models import Recipe
+
+# named catalog sizes for manage.py generate_catalog
+CATALOG_SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# fmt: off
+# the main ingredient names the dish, so name and ingredient searches overlap
+# the way they do in a real catalog
+MAIN_INGREDIENTS = [
+    "chicken", "beef", "pork", "lamb", "salmon", "tuna", "cod", "shrimp",
+    "tofu", "tempeh", "chickpeas", "lentils", "black beans", "mushrooms",
+    "eggplant", "zucchini", "cauliflower", "broccoli", "spinach", "kale",
+    "sweet potato", "potato", "pumpkin", "squash", "rice", "quinoa", "pasta",
+    "noodles", "eggs", "halloumi", "feta", "paneer", "oats", "apples",
+    "bananas", "berries", "pears", "peaches", "chocolate", "coconut",
+]
+DISHES = [
+    "Curry", "Stew", "Soup", "Salad", "Bowl", "Stir Fry", "Tacos", "Bake",
+    "Pie", "Risotto", "Skewers", "Wraps", "Burgers", "Fritters", "Casserole",
+    "Traybake", "Omelette", "Porridge", "Crumble", "Smoothie",
+]
+STYLES = [
+    "Quick", "Smoky", "Spicy", "Creamy", "Lemony", "Garlicky", "Herby",
+    "Crispy", "Sticky", "Roasted", "Grilled", "Weeknight", "Rustic", "Classic",
+    "Summer", "Winter", "Golden", "Zesty",
+]
+
+# (ingredient, weight): staples turn up in most recipes, the rest now and then
+PANTRY = [
+    ("salt", 30), ("olive oil", 25), ("garlic", 20), ("onion", 20),
+    ("black pepper", 18), ("butter", 12), ("sugar", 10), ("flour", 8),
+    ("lemon", 8), ("tomatoes", 8), ("milk", 6), ("parsley", 5), ("cumin", 5),
+    ("paprika", 5), ("ginger", 5), ("soy sauce", 5), ("chili flakes", 4),
+    ("coriander", 4), ("basil", 4), ("thyme", 4), ("rosemary", 3),
+    ("honey", 3), ("vinegar", 3), ("cream", 3), ("yogurt", 3), ("carrots", 3),
+    ("celery", 3), ("bell pepper", 3), ("spring onions", 3), ("lime", 3),
+    ("cinnamon", 2), ("turmeric", 2), ("sesame oil", 2), ("mustard", 2),
+    ("stock", 2), ("cheddar", 2), ("parmesan", 2), ("vanilla", 1),
+    ("nutmeg", 1), ("walnuts", 1), ("almonds", 1), ("capers", 1),
+    ("olives", 1), ("mint", 1), ("dill", 1), ("miso", 1), ("tahini", 1),
+]
+# fmt: on
+PANTRY_NAMES = [name for name, _ in PANTRY]
+PANTRY_WEIGHTS = [weight for _, weight in PANTRY]
+
+
+# one unsaved recipe with plausible ingredients and cooking time
+def synthetic_recipe(rng):
+    main = rng.choice(MAIN_INGREDIENTS)
+    name = f"{rng.choice(STYLES)} {main.title()} {rng.choice(DISHES)}"
+
+    # mostly 4 to 8 ingredients, sometimes just a couple or a long list
+    count = min(12, max(1, round(rng.gauss(6, 2.5))))
+    ingredients = [main]
+    while len(ingredients) < count:
+        extra = rng.choices(PANTRY_NAMES, weights=PANTRY_WEIGHTS)[0]
+        if extra not in ingredients:
+            ingredients.append(extra)
+
+    # skewed like real recipes: a median around 20 minutes and a long tail
+    cooking_time = min(240, max(1, round(rng.lognormvariate(3.0, 0.7))))
+
+    recipe = Recipe(
+        name=name, ingredients=", ".join(ingredients), cooking_time=cooking_time
+    )
+    recipe.update_derived_fields()
+    return recipe
+
+
+# writes size synthetic recipes in batches, yielding the running total after each;
+# the same seed always produces the same catalog
+def generate_catalog(size, seed=0, batch_size=1000):
+    rng = random.Random(seed)
+    ingredient_ids = {}
+    created = 0
+    for batch in batched(range(size), batch_size):
+        recipes = [synthetic_recipe(rng) for _ in batch]
+        save_batch(recipes, ingredient_ids)
+        created += len(recipes)
+        yield created
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .timing import timer
+from .utils import chart_cache_key, get_chart_cache, plotted_columns, render_chart
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# renders submitted by this process and not finished yet
+_pending = 0
+
+# the same renders by chart cache key, so a chart the search page started
+# warming is awaited by the chart view instead of being rendered a second time
+_in_flight = {}
+
+
+class ChartPoolBusy(Exception):
+    pass
+
+
+# 0 disables the pool and renders in the web process
+def pool_size():
+    workers = getattr(settings, "CHART_POOL_WORKERS", None)
+    return min(2, os.cpu_count() or 1) if workers is None else workers
+
+
+# renders allowed to wait for a worker before new ones are turned away
+def max_pending():
+    return getattr(settings, "CHART_POOL_MAX_PENDING", None) or pool_size() * 8
+
+
+def init_worker():
+    # spawned workers start without Django configured
+    django.setup()
+    # imported once per worker, so no render pays for loading matplotlib
+    import matplotlib.backends.backend_agg  # noqa: F401
+    import matplotlib.figure  # noqa: F401
+
+
+def worker_ready():
+    return os.getpid()
+
+
+# the pool is started on first use; spawned rather than forked, since forking a
+# threaded server can copy a lock another thread holds, e.g. the render lock
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=pool_size(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+            )
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+# starts every worker ahead of the first search; called when the ASGI server
+# starts, see PoolLifespan
+def warm_pool():
+    if pool_size() > 0:
+        pool = get_pool()
+        for _ in range(pool_size()):
+            pool.submit(worker_ready)
+
+
+# ASGI wrapper that starts the chart workers when the server starts up and
+# stops them on shutdown, through the lifespan protocol Django doesn't handle;
+# importing the ASGI module alone starts no processes
+class PoolLifespan:
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "lifespan":
+            return await self.application(scope, receive, send)
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                warm_pool()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await sync_to_async(shutdown_pool, thread_sensitive=False)()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+# the render of a chart already under way, or a new one in the pool; the future
+# it returns is shared by everyone waiting for that chart. Raises ChartPoolBusy
+# instead of queueing without limit
+def submit_render(chart_type, data, fmt="png", key=None):
+    global _pending
+    key = key or chart_cache_key(chart_type, data, fmt)
+    with _pool_lock:
+        if key in _in_flight:
+            return _in_flight[key]
+        if _pending >= max_pending():
+            raise ChartPoolBusy()
+        _pending += 1
+        rendered = _in_flight[key] = Future()
+        # running, so one waiter giving up can't cancel it for the others
+        rendered.set_running_or_notify_cancel()
+    try:
+        # only the plotted columns are pickled over to the workers
+        future = get_pool().submit(
+            render_chart, chart_type, plotted_columns(chart_type, data), fmt
+        )
+    except BaseException as error:
+        _finish(key, rendered, error=error)
+        raise
+    future.add_done_callback(lambda future: _finish(key, rendered, future=future))
+    return rendered
+
+
+# hands a render's outcome to everyone waiting for it, then lets the chart be
+# submitted again; in this order, a waiter caching the chart does so before a
+# new request could miss the cache and find nothing in flight
+def _finish(key, rendered, future=None, error=None):
+    global _pending
+    if future is not None:
+        try:
+            chart = future.result()
+        except BaseException as failure:
+            error = failure
+    if error is None:
+        rendered.set_result(chart)
+    else:
+        rendered.set_exception(error)
+    with _pool_lock:
+        _pending -= 1
+        del _in_flight[key]
+
+
+# renders in a worker process while the event loop keeps serving other requests;
+# raises ChartPoolBusy when the pool is full. If the pool is broken, e.g. a
+# worker was killed, the chart is rendered here and a fresh pool is started for
+# the next one, so a lost worker never turns into an error page
+async def render_chart_async(chart_type, data, fmt="png", key=None):
+    if pool_size() > 0:
+        try:
+            rendered = submit_render(chart_type, data, fmt, key)
+            # the profiles of ProfilingMiddleware can't see into the workers, so
+            # the wait is timed for them separately from "chart"
+            with timer("chart_pool"):
+                return await asyncio.wrap_future(rendered)
+        except BrokenProcessPool:
+            logger.warning("Chart pool broken, rendering in-process", exc_info=True)
+            shutdown_pool()
+    return await sync_to_async(render_chart, thread_sensitive=False)(
+        chart_type, plotted_columns(chart_type, data), fmt
+    )
+
+
+# starts rendering the charts of a search in the pool and returns at once, so
+# the page doesn't wait for them; each chart is cached when its render finishes,
+# and the chart views await a render still in flight rather than start another.
+# Returns futures that finish once the charts are cached. Nothing is warmed
+# without a pool, or when it is busy: that would only move the wait here
+def warm_charts(chart_types, data, fmt="png"):
+    if pool_size() == 0:
+        return []
+    cache = get_chart_cache()
+    keys = {
+        chart_type: chart_cache_key(chart_type, data, fmt) for chart_type in chart_types
+    }
+    cached = cache.get_many(keys.values())
+
+    warming = []
+    for chart_type, key in keys.items():
+        if key in cached:
+            continue
+        try:
+            rendered = submit_render(chart_type, data, fmt, key)
+        except ChartPoolBusy:
+            break
+        except (BrokenProcessPool, OSError, RuntimeError):
+            logger.warning("Chart pool unavailable, not warming charts", exc_info=True)
+            shutdown_pool()
+            break
+        warming.append(cache_when_done(rendered, key))
+    return warming
+
+
+# a future that finishes once the render's chart is in the cache; a failed
+# render is logged and left for the chart view to retry
+def cache_when_done(future, key):
+    cached = Future()
+
+    def store(future):
+        try:
+            get_chart_cache().set(key, future.result())
+        except Exception:
+            logger.warning("Could not warm chart %s", key, exc_info=True)
+        finally:
+            cached.set_result(key)
+
+    future.add_done_callback(store)
+    return cached
+
+
+# like get_chart, for async views: the cache is read and written without
+# blocking and misses are rendered in the pool
+async def aget_chart(chart_type, data, fmt="png"):
+    cache = get_chart_cache()
+    key = chart_cache_key(chart_type, data, fmt)
+
+    chart = await cache.aget(key)
+    if chart is None:
+        with timer("chart"):
+            chart = await render_chart_async(chart_type, data, fmt, key)
+        await cache.aset(key, chart)
+    return chart
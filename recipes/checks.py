@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache.backends.locmem import LocMemCache
+
+from .utils import get_user_cache
+
+# the session engines and backend that read sessions and users from the cache
+CACHED_SESSION_ENGINES = {
+    "django.contrib.sessions.backends.cache",
+    "django.contrib.sessions.backends.cached_db",
+}
+CACHED_USER_BACKEND = "recipes.backends.CachedModelBackend"
+
+
+# sessions and users cached per process outlive a logout or deactivation in
+# every other web process; only acceptable on a development server
+@checks.register(checks.Tags.caches)
+def check_session_cache(app_configs, **kwargs):
+    cached = (
+        settings.SESSION_ENGINE in CACHED_SESSION_ENGINES
+        or CACHED_USER_BACKEND in settings.AUTHENTICATION_BACKENDS
+    )
+    if settings.DEBUG or not cached or not isinstance(get_user_cache(), LocMemCache):
+        return []
+    return [
+        checks.Error(
+            "The 'sessions' cache is a LocMemCache, which each web process keeps "
+            "to itself.",
+            hint=(
+                "Set REDIS_URL, or SESSION_CACHE_BACKEND to another cache the web "
+                "processes share, such as Memcached, or unset both to read "
+                "sessions and users from the database."
+            ),
+            id="recipes.E001",
+        )
+    ]
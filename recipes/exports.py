@@ -0,0 +1,66 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+# columns written by every export, in order
+EXPORT_FIELDS = (
+    "id",
+    "name",
+    "ingredients",
+    "cooking_time",
+    "difficulty",
+    "number_of_ingredients",
+)
+
+# rows fetched from the database per round trip while streaming
+EXPORT_CHUNK_SIZE = 2000
+
+# lines joined into each chunk handed to an ASGI server, one thread hop per chunk
+ASYNC_LINES_PER_CHUNK = 500
+
+
+# file-like object that hands back what csv.writer writes instead of storing it
+class Echo:
+    def write(self, value):
+        return value
+
+
+# streams the rows of a queryset in chunks, never holding the whole result
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    if not queryset.ordered:
+        # a stable order backed by recipe_name_id_idx
+        queryset = queryset.order_by("name", "id")
+    return queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def csv_lines(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in export_rows(queryset, chunk_size):
+        yield writer.writerow(row)
+
+
+# newline-delimited JSON: one object per recipe, so clients can parse as it arrives
+def ndjson_lines(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    for row in export_rows(queryset, chunk_size):
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\n"
+
+
+# the same lines for ASGI servers, which read a sync iterator to the end before
+# sending anything; the database cursor stays in the request's sync thread
+async def async_lines(lines, lines_per_chunk=ASYNC_LINES_PER_CHUNK):
+    next_chunk = sync_to_async(lambda: "".join(islice(lines, lines_per_chunk)))
+    try:
+        while chunk := await next_chunk():
+            yield chunk
+    finally:
+        await sync_to_async(lines.close)()
+
+
+# format in the URL: (line generator, content type, file extension)
+EXPORT_FORMATS = {
+    "csv": (csv_lines, "text/csv", "csv"),
+    "ndjson": (ndjson_lines, "application/x-ndjson", "ndjson"),
+}
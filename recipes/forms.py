@@ -1,30 +1,121 @@
+from urllib.parse import urlencode
 from django import forms  # import django forms
-from .models import Recipe
+from .models import Recipe, DIFFICULTY_CHOICES
+from .search import full_text_search
 
 SEARCH_CHOICES = [
     ("name", "Recipe Name"),
+    ("full_text", "Keywords in Name or Ingredients"),
     ("cooking_time", "Cooking Time in Minutes"),
     ("difficulty", "Difficulty"),
+    ("ingredient", "Ingredient"),
+    ("max_ingredients", "Maximum Number of Ingredients"),
+    ("combined", "Several Criteria"),
 ]
 
 
+CHART_MODE_CHOICES = [
+    ("", "Automatic"),
+    ("image", "Images drawn on the server"),
+    ("client", "Drawn in the browser"),
+]
+
+# fields that change how results are shown, not which recipes match
+DISPLAY_FIELDS = ("chart_mode",)
+
+
 # define class-based Form imported from Django forms
 class RecipesSearchForm(forms.Form):
     search_by = forms.ChoiceField(
         choices=SEARCH_CHOICES, required=True, label="Search by"
     )
     search_term = forms.CharField(max_length=100, required=False, label="Search term")
+    ingredient = forms.CharField(max_length=100, required=False, label="Ingredient")
     cooking_time = forms.IntegerField(required=False, label="Cooking Time in Minutes")
+    min_cooking_time = forms.IntegerField(
+        required=False, min_value=0, label="Cooking Time at Least"
+    )
+    max_cooking_time = forms.IntegerField(
+        required=False, min_value=0, label="Cooking Time at Most"
+    )
     difficulty = forms.ChoiceField(
-        choices=[
-            ("Easy", "Easy"),
-            ("Medium", "Medium"),
-            ("Intermediate", "Intermediate"),
-            ("Hard", "Hard"),
-        ],
+        choices=[("", "Any"), *DIFFICULTY_CHOICES],
         required=False,
         label="Difficulty",
     )
+    max_ingredients = forms.IntegerField(
+        required=False, min_value=0, label="Maximum Number of Ingredients"
+    )
+    chart_mode = forms.ChoiceField(
+        choices=CHART_MODE_CHOICES, required=False, label="Charts"
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        minimum = cleaned_data.get("min_cooking_time")
+        maximum = cleaned_data.get("max_cooking_time")
+        if minimum is not None and maximum is not None and minimum > maximum:
+            raise forms.ValidationError(
+                "The minimum cooking time can't be above the maximum."
+            )
+        return cleaned_data
+
+    # exact cooking time if given, otherwise the min/max range
+    def filter_cooking_time(self, qs):
+        cooking_time = self.cleaned_data.get("cooking_time")
+        if cooking_time is not None:
+            return qs.filter(cooking_time=cooking_time)
+        return qs.with_cooking_time_between(
+            self.cleaned_data.get("min_cooking_time"),
+            self.cleaned_data.get("max_cooking_time"),
+        )
+
+    # filters the recipes based on the validated form input
+    def get_queryset(self):
+        search_by = self.cleaned_data.get("search_by")
+        search_term = self.cleaned_data.get("search_term")
+        ingredient = self.cleaned_data.get("ingredient")
+        difficulty = self.cleaned_data.get("difficulty")
+        max_ingredients = self.cleaned_data.get("max_ingredients")
+
+        qs = Recipe.objects.all()
+
+        # every filled-in criterion applies, combined into a single query
+        if search_by == "combined":
+            if search_term:
+                qs = qs.filter(name__icontains=search_term)
+            if ingredient:
+                qs = qs.with_ingredient(ingredient)
+            if difficulty:
+                qs = qs.filter(difficulty=difficulty)
+            if max_ingredients is not None:
+                qs = qs.with_max_ingredients(max_ingredients)
+            return self.filter_cooking_time(qs)
+
+        if search_by == "name" and search_term:
+            qs = qs.filter(name__icontains=search_term)
+        elif search_by == "full_text" and search_term:
+            qs = full_text_search(qs, search_term)
+        elif search_by == "cooking_time":
+            qs = self.filter_cooking_time(qs)
+        elif search_by == "difficulty" and difficulty:
+            qs = qs.filter(difficulty=difficulty)
+        elif search_by == "ingredient" and search_term:
+            qs = qs.with_ingredient(search_term)
+        elif search_by == "max_ingredients" and max_ingredients is not None:
+            qs = qs.with_max_ingredients(max_ingredients)
+
+        return qs
+
+    # encodes the validated criteria so other endpoints can repeat the search
+    def get_query_string(self):
+        return urlencode(
+            {
+                field: value
+                for field, value in self.cleaned_data.items()
+                if value not in (None, "") and field not in DISPLAY_FIELDS
+            }
+        )
 
 
 class AddRecipeForm(forms.ModelForm):
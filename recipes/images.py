@@ -0,0 +1,72 @@
+import hashlib
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# the placeholder every recipe starts with, served as-is
+DEFAULT_PICTURE = "no_picture.jpg"
+
+RENDITIONS_DIR = "recipes/renditions"
+
+# field name: (longest side in pixels, Pillow format, file extension, save options)
+RENDITIONS = {
+    "pic_thumbnail": (200, "JPEG", "jpg", {"quality": 80, "optimize": True}),
+    "pic_medium": (800, "JPEG", "jpg", {"quality": 82, "optimize": True}),
+    "pic_webp": (800, "WEBP", "webp", {"quality": 80, "method": 4}),
+}
+
+
+# name derived from the source bytes, so identical uploads share renditions
+def rendition_name(digest, field, extension):
+    suffix = field.replace("pic_", "")
+    return f"{RENDITIONS_DIR}/{digest[:20]}_{suffix}.{extension}"
+
+
+def resize(image, longest_side):
+    copy = image.copy()
+    copy.thumbnail((longest_side, longest_side), Image.LANCZOS)
+    return copy
+
+
+# creates every rendition of a stored picture that doesn't exist yet and
+# returns {field name: stored name}; runs in process pool workers too, so it
+# only touches storage, never the database
+def generate_renditions(source_name, storage=None):
+    storage = storage or default_storage
+
+    with storage.open(source_name, "rb") as source:
+        content = source.read()
+    digest = hashlib.sha256(content).hexdigest()
+
+    names = {
+        field: rendition_name(digest, field, extension)
+        for field, (_, _, extension, _) in RENDITIONS.items()
+    }
+    missing = [field for field, name in names.items() if not storage.exists(name)]
+    if not missing:
+        return names
+
+    with Image.open(BytesIO(content)) as image:
+        # applies camera rotation and drops alpha/palette modes JPEG can't store
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for field in missing:
+            longest_side, image_format, _, options = RENDITIONS[field]
+            buffer = BytesIO()
+            resize(image, longest_side).save(buffer, image_format, **options)
+            names[field] = storage.save(names[field], ContentFile(buffer.getvalue()))
+
+    return names
+
+
+# like generate_renditions, but logs and returns None for missing or broken files
+def try_generate_renditions(source_name, storage=None):
+    try:
+        return generate_renditions(source_name, storage)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        logger.warning("Could not create renditions for %s", source_name, exc_info=True)
+        return None
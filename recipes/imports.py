@@ -0,0 +1,88 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from .forms import AddRecipeForm
+from .models import Ingredient, Recipe, RecipeIngredient, parse_ingredients
+
+# columns read from every record; pictures can't come from a text file
+IMPORT_FIELDS = ("name", "ingredients", "cooking_time")
+
+
+def read_csv_records(lines):
+    yield from csv.DictReader(lines)
+
+
+# newline-delimited JSON, one object per line; blank lines are skipped and
+# lines that don't parse come back as None, to be reported like invalid records
+def read_ndjson_records(lines):
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+# file extension: record reader
+IMPORT_FORMATS = {
+    "csv": read_csv_records,
+    "ndjson": read_ndjson_records,
+    "jsonl": read_ndjson_records,
+}
+
+
+# groups an iterable into lists of at most size items, without reading ahead
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# validates a record with the same rules as the add recipe page; returns
+# (unsaved recipe, None) or (None, errors)
+def build_recipe(record):
+    if not isinstance(record, dict):
+        return None, {
+            "__all__": [{"message": "Not a recipe record", "code": "invalid"}]
+        }
+    form = AddRecipeForm(
+        {field: record.get(field, "") for field in IMPORT_FIELDS}, files={}
+    )
+    if not form.is_valid():
+        return None, form.errors.get_json_data()
+    recipe = form.instance
+    recipe.update_derived_fields()
+    return recipe, None
+
+
+# maps ingredient names to primary keys, creating the missing ones; ids is a
+# cache shared across batches, since most names repeat
+def ingredient_ids(names, ids):
+    missing = [name for name in names if name not in ids]
+    if missing:
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name) for name in missing], ignore_conflicts=True
+        )
+        ids.update(
+            Ingredient.objects.filter(name__in=missing).values_list("name", "pk")
+        )
+    return ids
+
+
+# writes one batch of valid recipes and their join table rows in a transaction
+def save_batch(recipes, ids):
+    with transaction.atomic():
+        # bulk_create skips save() and its signals; the caller rebuilds what they'd update
+        Recipe.objects.bulk_create(recipes)
+        names_per_recipe = [parse_ingredients(recipe.ingredients) for recipe in recipes]
+        ingredient_ids({name for names in names_per_recipe for name in names}, ids)
+        RecipeIngredient.objects.bulk_create(
+            [
+                RecipeIngredient(recipe_id=recipe.pk, ingredient_id=ids[name])
+                for recipe, names in zip(recipes, names_per_recipe)
+                for name in names
+            ]
+        )
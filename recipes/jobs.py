@@ -0,0 +1,160 @@
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .images import generate_renditions
+from .utils import invalidate_recipe_detail
+from .models import (
+    Job,
+    Recipe,
+    RENDITIONS_FAILED,
+    RENDITIONS_PENDING,
+    RENDITIONS_READY,
+)
+
+logger = logging.getLogger(__name__)
+
+# task name: (function run with the payload, function run once retries are exhausted)
+TASKS = {}
+
+# first retry waits this long, doubling with every attempt
+RETRY_DELAY = timedelta(seconds=30)
+
+# a running job's updated_at is refreshed this often, so a job is only stale once
+# its worker has stopped, however long the task itself takes
+HEARTBEAT_INTERVAL = timedelta(seconds=60)
+
+
+def task(name, on_failure=None):
+    def register(function):
+        TASKS[name] = (function, on_failure)
+        return function
+
+    return register
+
+
+# adds a job to the queue; call inside the transaction that makes the work necessary
+def enqueue(task_name, max_attempts=3, **payload):
+    if task_name not in TASKS:
+        raise ValueError(f"Unknown task {task_name!r}")
+    return Job.objects.create(
+        task=task_name, payload=payload, max_attempts=max_attempts
+    )
+
+
+# atomically moves the oldest due job to running; a conditional update means two
+# workers can never claim the same job, on any database backend
+def claim_next_job():
+    while True:
+        candidate = (
+            Job.objects.filter(status=Job.PENDING, run_after__lte=timezone.now())
+            .order_by("run_after", "id")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if candidate is None:
+            return None
+        claimed = Job.objects.filter(pk=candidate, status=Job.PENDING).update(
+            status=Job.RUNNING, attempts=F("attempts") + 1, updated_at=timezone.now()
+        )
+        if claimed:
+            return Job.objects.get(pk=candidate)
+
+
+# touches a running job until stopped; runs in its own thread and connection
+def heartbeat(job, stop):
+    try:
+        while not stop.wait(HEARTBEAT_INTERVAL.total_seconds()):
+            Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(
+                updated_at=timezone.now()
+            )
+    finally:
+        connection.close()
+
+
+# runs one claimed job, scheduling a retry or marking it failed on errors
+def run_job(job):
+    function, on_failure = TASKS[job.task]
+    stop = threading.Event()
+    beat = threading.Thread(target=heartbeat, args=(job, stop), daemon=True)
+    beat.start()
+    try:
+        function(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            give_up(job)
+        else:
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1)
+            logger.warning("Job %s failed, retrying at %s", job, job.run_after)
+    else:
+        job.status = Job.DONE
+        job.last_error = ""
+    finally:
+        stop.set()
+        beat.join()
+    job.save()
+    return job
+
+
+# logs a job that ran out of attempts and runs its task's failure hook
+def give_up(job):
+    logger.error("Job %s failed after %s attempts", job, job.attempts)
+    _, on_failure = TASKS[job.task]
+    if on_failure is not None:
+        on_failure(**job.payload)
+
+
+# claims and runs the next due job, returning it, or None when the queue is empty
+def run_next_job():
+    job = claim_next_job()
+    if job is not None:
+        run_job(job)
+    return job
+
+
+# puts back jobs whose worker died while running them, i.e. whose heartbeat
+# stopped; claiming counted the attempt, so a job that keeps killing its worker
+# fails once it runs out
+def requeue_stale_jobs(older_than):
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, updated_at__lt=now - older_than)
+    failed = 0
+    for job in stale.filter(attempts__gte=F("max_attempts")):
+        # conditional, so two workers requeueing at once run the hook only once
+        if Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(
+            status=Job.FAILED,
+            last_error="Worker stopped while running the job",
+            updated_at=now,
+        ):
+            give_up(job)
+            failed += 1
+    return failed + stale.update(status=Job.PENDING, run_after=now, updated_at=now)
+
+
+def mark_renditions_failed(recipe_id):
+    Recipe.objects.filter(pk=recipe_id).update(
+        renditions_status=RENDITIONS_FAILED, updated_at=timezone.now()
+    )
+    invalidate_recipe_detail(recipe_id)
+
+
+@task("renditions", on_failure=mark_renditions_failed)
+def create_renditions(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).only("pic").first()
+    if recipe is None:
+        return
+    names = generate_renditions(recipe.pic.name)
+
+    # only applies if the picture wasn't replaced while this job ran
+    Recipe.objects.filter(
+        pk=recipe_id, pic=recipe.pic.name, renditions_status=RENDITIONS_PENDING
+    ).update(renditions_status=RENDITIONS_READY, updated_at=timezone.now(), **names)
+    invalidate_recipe_detail(recipe_id)
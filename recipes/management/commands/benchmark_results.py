@@ -0,0 +1,98 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+DIFFICULTIES = ["Easy", "Medium", "Intermediate", "Hard"]
+
+
+# synthetic (id, name, cooking_time, difficulty) rows, as values_list returns them
+def make_rows(size):
+    return [
+        (number, f"Recipe <{number}> & co", number % 90, DIFFICULTIES[number % 4])
+        for number in range(1, size + 1)
+    ]
+
+
+# the former search path: DataFrame, two row-wise apply calls and to_html
+def render_with_pandas(rows):
+    import pandas as pd
+
+    recipes_df = pd.DataFrame(
+        [
+            {
+                "id": id,
+                "name": name,
+                "cooking_time": cooking_time,
+                "difficulty": difficulty,
+            }
+            for id, name, cooking_time, difficulty in rows
+        ]
+    )
+    recipes_df.index += 1
+
+    def format_recipe_name_table(row):
+        url = reverse("recipes:detail", kwargs={"pk": row["id"]})
+        return f"<a href='{url}'>{row['name']}</a>"
+
+    def format_recipe_name_chart(row):
+        return row["name"]
+
+    recipes_df["name_table"] = recipes_df.apply(format_recipe_name_table, axis=1)
+    recipes_df["name_chart"] = recipes_df.apply(format_recipe_name_chart, axis=1)
+
+    recipes_df = recipes_df[["name_table", "cooking_time", "difficulty"]]
+    recipes_df = recipes_df.rename(columns={"name_table": "Name"})
+    recipes_df = recipes_df.rename(columns={"cooking_time": "Cooking Time in Minutes"})
+    recipes_df.columns = recipes_df.columns.str.capitalize()
+    return recipes_df.to_html(escape=False)
+
+
+# the current search path: rows go straight into the template
+def render_with_template(rows):
+    return render_to_string("recipes/results_table.html", {"results": rows})
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the pandas and template search results paths at several result sizes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10, 1000, 50000],
+            help="Result set sizes to render",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Runs per size, best time is kept"
+        )
+
+    def handle(self, *args, **options):
+        paths = [("pandas", render_with_pandas), ("template", render_with_template)]
+
+        # warm up imports and template loading so they aren't timed
+        for _, render in paths:
+            render(make_rows(1))
+
+        self.stdout.write(
+            f"{'rows':>8} {'pandas ms':>12} {'template ms':>12} {'speedup':>8}"
+        )
+        for size in options["sizes"]:
+            rows = make_rows(size)
+            timings = {}
+            for label, render in paths:
+                best = None
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    render(rows)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                timings[label] = best * 1000
+            self.stdout.write(
+                f"{size:>8} {timings['pandas']:>12.1f} {timings['template']:>12.1f}"
+                f" {timings['pandas'] / timings['template']:>7.1f}x"
+            )
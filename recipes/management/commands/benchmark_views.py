@@ -0,0 +1,222 @@
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+import uuid
+from statistics import mean, quantiles
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from recipes.chart_pool import shutdown_pool
+from recipes.models import Recipe
+from recipes.utils import CHART_CACHE_ALIAS, VIEW_CACHE_ALIAS, get_chart
+from recipes.views import (
+    CHART_FIELDS,
+    CHART_KINDS,
+    CLIENT_CHART_THRESHOLD,
+    chart_data,
+)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+# counts statements on the connection; unlike CaptureQueriesContext it isn't
+# reset by the request_started signal of the requests it measures
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+# runs call once to warm up, repeat times for latency, then once each with
+# query counting and with tracemalloc so neither slows down the timed runs
+def measure(call, repeat):
+    call()
+
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        call()
+
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    cuts = quantiles(latencies, n=100, method="inclusive")
+    return {
+        "latency_ms": {
+            **{f"p{percent}": round(cuts[percent - 1], 3) for percent in PERCENTILES},
+            "mean": round(mean(latencies), 3),
+            "max": round(max(latencies), 3),
+        },
+        "queries": queries.count,
+        "peak_memory_kib": round(peak / 1024, 1),
+    }
+
+
+# the commit being measured, so results from different commits can be compared
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures latency percentiles, query counts and peak memory of the list, "
+        "detail, search and chart paths at several result sizes, as JSON; "
+        "fill the database with manage.py generate_catalog first"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10, 100, 1000, 10000],
+            help="Result set sizes for search",
+        )
+        parser.add_argument(
+            "--chart-sizes",
+            type=int,
+            nargs="+",
+            # the search page stops drawing images above the threshold
+            default=[10, CLIENT_CHART_THRESHOLD, 500],
+            help="Rows plotted per chart",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Timed runs per measurement"
+        )
+        parser.add_argument(
+            "--output", default="-", help="JSON file to write, - for stdout"
+        )
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            help="Keep the chart and view caches instead of rendering every time",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 2:
+            raise CommandError("--repeat must be at least 2")
+        total = Recipe.objects.count()
+        if not total:
+            raise CommandError("No recipes to benchmark, run generate_catalog first")
+        sizes = sorted({min(size, total) for size in options["sizes"]})
+        chart_sizes = sorted({min(size, total) for size in options["chart_sizes"]})
+
+        caches = dict(settings.CACHES)
+        if not options["cached"]:
+            # otherwise every run after the warm-up measures a cache hit
+            dummy = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            caches.update({CHART_CACHE_ALIAS: dummy, VIEW_CACHE_ALIAS: dummy})
+
+        user = User.objects.create_user(username=f"benchmark-{uuid.uuid4().hex[:12]}")
+        client = Client()
+        client.force_login(user)
+        try:
+            with override_settings(
+                CACHES=caches, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+            ):
+                results = list(
+                    self.run(
+                        client,
+                        sizes,
+                        chart_sizes,
+                        options["repeat"],
+                        options["verbosity"],
+                    )
+                )
+        finally:
+            shutdown_pool()
+            client.logout()
+            user.delete()
+
+        report = {
+            "commit": git_commit(),
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "recipes": total,
+            "repeat": options["repeat"],
+            "cached": options["cached"],
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"] == "-":
+            self.stdout.write(output)
+        else:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output + "\n")
+            self.stderr.write(f"Wrote {len(results)} results to {options['output']}")
+
+    # yields one result per view and result set size
+    def run(self, client, sizes, chart_sizes, repeat, verbosity):
+        def fetch(url, data=None):
+            def call():
+                if data is None:
+                    response = client.get(url)
+                else:
+                    response = client.post(url, data)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} returned {response.status_code}")
+
+            return call
+
+        def result(view, rows, call):
+            if verbosity > 1:
+                self.stderr.write(f"{view}, {rows} rows")
+            return {"view": view, "rows": rows, **measure(call, repeat)}
+
+        # list and detail pages have a fixed size
+        yield result("list", 20, fetch(reverse("recipes:list")))
+        middle = Recipe.objects.order_by("pk").values_list("pk", flat=True)[
+            Recipe.objects.count() // 2
+        ]
+        yield result(
+            "detail", 1, fetch(reverse("recipes:detail", kwargs={"pk": middle}))
+        )
+
+        # the shortest cooking time limit that matches at least size recipes
+        search_url = reverse("recipes:search")
+        cooking_times = Recipe.objects.order_by("cooking_time").values_list(
+            "cooking_time", flat=True
+        )
+        for size in sizes:
+            limit = cooking_times[size - 1]
+            rows = Recipe.objects.filter(cooking_time__lte=limit).count()
+            criteria = {"search_by": "cooking_time", "max_cooking_time": limit}
+            yield result("search", rows, fetch(search_url, criteria))
+
+        chart_rows = Recipe.objects.order_by("pk").values_list(*CHART_FIELDS)
+        for size in chart_sizes:
+            data = chart_data(list(chart_rows[:size]))
+            for kind, chart_type in CHART_KINDS.items():
+                yield result(f"chart:{kind}", size, lambda: get_chart(chart_type, data))
@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from recipes.catalog import CATALOG_SIZES, generate_catalog
+from recipes.models import Recipe
+from recipes.stats import rebuild_statistics
+from recipes.utils import get_chart_cache, get_view_cache
+
+
+# "1k", "100k", "1m" or a plain number of recipes
+def catalog_size(value):
+    size = CATALOG_SIZES.get(value.lower())
+    if size is None:
+        try:
+            size = int(value)
+        except ValueError:
+            raise CommandError(
+                f"Size must be a number or one of {', '.join(CATALOG_SIZES)}"
+            )
+    return size
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the database with a synthetic recipe catalog for benchmarks, "
+        "see manage.py benchmark_views"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "size", help=f"Recipes to create: {', '.join(CATALOG_SIZES)} or a number"
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Same seed, same catalog"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Recipes written per transaction",
+        )
+        parser.add_argument(
+            "--append",
+            action="store_true",
+            help="Add to the recipes already in the database",
+        )
+
+    def handle(self, *args, **options):
+        size = catalog_size(options["size"])
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError("The database can't return ids from bulk inserts")
+        # benchmarks compare catalogs of a known size, not whatever was there before
+        if not options["append"] and Recipe.objects.exists():
+            raise CommandError(
+                "The database already has recipes; point DATABASE_URL at an empty "
+                "database or pass --append"
+            )
+
+        start = time.perf_counter()
+        for created in generate_catalog(size, options["seed"], options["batch_size"]):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{created} recipes created")
+
+        # bulk inserts skip the signal receivers, so derived tables are rebuilt once
+        rebuild_statistics()
+        get_chart_cache().clear()
+        get_view_cache().clear()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {size} recipes in {elapsed:.1f}s")
+        )
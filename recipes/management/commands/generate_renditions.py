@@ -0,0 +1,96 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from recipes.images import DEFAULT_PICTURE, RENDITIONS, try_generate_renditions
+from recipes.models import Recipe, RENDITIONS_READY
+from recipes.utils import get_view_cache
+
+
+def init_worker():
+    # spawned workers start without Django configured; forked ones already are
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Creates missing picture renditions for existing recipes, in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes, 1 renders in this process",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Also revisit recipes that already have renditions",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Rows written per update"
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(pic="").exclude(pic=DEFAULT_PICTURE)
+        if not options["all"]:
+            recipes = recipes.filter(
+                Q(pic_thumbnail="") | Q(pic_medium="") | Q(pic_webp="")
+            )
+
+        # recipes sharing a picture only need it processed once
+        recipes_by_pic = {}
+        for pk, pic in recipes.values_list("pk", "pic").iterator():
+            recipes_by_pic.setdefault(pic, []).append(pk)
+        pics = list(recipes_by_pic)
+
+        start = time.perf_counter()
+        if options["workers"] > 1 and len(pics) > 1:
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=init_worker
+            ) as pool:
+                results = list(pool.map(try_generate_renditions, pics, chunksize=4))
+        else:
+            results = [try_generate_renditions(pic) for pic in pics]
+
+        updated = []
+        failed = 0
+        now = timezone.now()
+        for pic, names in zip(pics, results):
+            if names is None:
+                failed += 1
+                self.stderr.write(f"Could not process {pic}")
+                continue
+            for pk in recipes_by_pic[pic]:
+                updated.append(
+                    Recipe(
+                        pk=pk,
+                        renditions_status=RENDITIONS_READY,
+                        updated_at=now,
+                        **names,
+                    )
+                )
+
+        # a bulk update skips save() and signals, the pictures themselves didn't change
+        Recipe.objects.bulk_update(
+            updated,
+            [*RENDITIONS, "renditions_status", "updated_at"],
+            batch_size=options["batch_size"],
+        )
+
+        # cached detail pages still show the old pictures
+        if updated:
+            get_view_cache().clear()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {len(pics) - failed} pictures for {len(updated)} recipes "
+                f"in {elapsed:.1f}s ({failed} failed)"
+            )
+        )
@@ -0,0 +1,71 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from recipes.imports import IMPORT_FORMATS, batched, build_recipe, save_batch
+from recipes.stats import rebuild_statistics
+from recipes.utils import get_chart_cache
+
+
+class Command(BaseCommand):
+    help = "Imports recipes from a CSV or newline-delimited JSON file in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV, NDJSON or JSONL file to import")
+        parser.add_argument(
+            "--format",
+            choices=sorted(IMPORT_FORMATS),
+            help="File format, guessed from the extension by default",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Recipes written per transaction",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError(f"Unknown format {file_format!r}, use --format")
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError("The database can't return ids from bulk inserts")
+
+        imported = 0
+        skipped = 0
+        ingredient_ids = {}
+        start = time.perf_counter()
+
+        # the file is read lazily, one batch of records at a time
+        with path.open(newline="", encoding="utf-8") as lines:
+            records = IMPORT_FORMATS[file_format](lines)
+            for batch in batched(enumerate(records, start=1), options["batch_size"]):
+                recipes = []
+                for number, record in batch:
+                    recipe, errors = build_recipe(record)
+                    if errors:
+                        skipped += 1
+                        self.stderr.write(f"Record {number} skipped: {errors}")
+                    else:
+                        recipes.append(recipe)
+                if recipes:
+                    save_batch(recipes, ingredient_ids)
+                imported += len(recipes)
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"{imported} recipes imported")
+
+        # once for the whole import instead of the per-recipe signal receivers
+        rebuild_statistics()
+        get_chart_cache().clear()
+
+        elapsed = time.perf_counter() - start
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} recipes in {elapsed:.1f}s "
+                f"({rate:.0f} rows/s, {skipped} skipped)"
+            )
+        )
@@ -0,0 +1,172 @@
+import asyncio
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from statistics import quantiles
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from recipes.chart_pool import init_worker, shutdown_pool
+from recipes.utils import CHART_CACHE_ALIAS
+
+# the logged-in client of a sync worker process
+_client = None
+
+
+def summarize(latencies, elapsed):
+    p50, p95 = [quantiles(latencies, n=100)[index] for index in (49, 94)]
+    return len(latencies) / elapsed, p50 * 1000, p95 * 1000
+
+
+# sets up a sync worker process like a chart pool worker, with the same settings
+# and session as the command
+def init_sync_worker(overrides, session_key):
+    global _client
+    init_worker()
+    override_settings(**overrides).enable()
+    _client = Client()
+    _client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+
+
+# one request to the sync view, served and rendered in this worker process
+def fetch_sync(url):
+    started = time.perf_counter()
+    response = _client.get(url)
+    if response.status_code != 200:
+        raise RuntimeError(f"Sync chart returned {response.status_code}")
+    return time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the sync and async chart views with the same number of "
+        "render processes and compares their throughput: N sync worker "
+        "processes serving one request at a time, against one event loop "
+        "rendering in an N-process chart pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=48)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help=("Sync worker processes, and chart pool processes for the async view"),
+        )
+        parser.add_argument("--kind", default="bar", choices=["bar", "pie", "line"])
+        parser.add_argument(
+            "--query",
+            default="search_by=name&search_term=a",
+            help="Search query string whose results are plotted",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"]
+        kind = options["kind"]
+        query = options["query"]
+        total = options["requests"]
+
+        user = get_user_model().objects.create_user(
+            username=f"load-test-{uuid.uuid4().hex[:12]}"
+        )
+        client = Client()
+        client.force_login(user)
+
+        # every request renders: the chart cache would turn this into a cache benchmark
+        caches = {
+            **settings.CACHES,
+            CHART_CACHE_ALIAS: {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+            },
+        }
+        overrides = {
+            "CACHES": caches,
+            "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+        }
+        try:
+            with override_settings(
+                **overrides,
+                CHART_POOL_WORKERS=concurrency,
+                CHART_POOL_MAX_PENDING=total,
+            ):
+                chart = {"kind": kind, "fmt": "png"}
+                sync_url = f"{reverse('recipes:chart', kwargs=chart)}?{query}"
+                async_url = f"{reverse('recipes:chart_async', kwargs=chart)}?{query}"
+
+                session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+                sync_result = self.run_sync(
+                    overrides, session_key, sync_url, total, concurrency
+                )
+                async_result = asyncio.run(
+                    self.run_async(client, async_url, total, concurrency)
+                )
+        finally:
+            shutdown_pool()
+            client.logout()
+            user.delete()
+
+        self.stdout.write(
+            f"{total} uncached {kind} charts, {concurrency} render processes each side"
+        )
+        self.stdout.write(
+            f"sync : {concurrency} worker processes, one request at a time each, "
+            f"rendering in the worker"
+        )
+        self.stdout.write(
+            f"async: one event loop, {concurrency} requests at a time, rendering "
+            f"in a {concurrency}-process chart pool"
+        )
+        for label, (rate, p50, p95) in (
+            ("sync ", sync_result),
+            ("async", async_result),
+        ):
+            self.stdout.write(
+                f"{label}: {rate:6.1f} req/s, p50 {p50:7.1f} ms, p95 {p95:7.1f} ms"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"async/sync throughput: {async_result[0] / sync_result[0]:.2f}x "
+                f"with {concurrency} workers"
+            )
+        )
+
+    # the WSGI path: a process per worker, like gunicorn's sync workers; threads
+    # would take turns on the render lock and measure one renderer, not N
+    def run_sync(self, overrides, session_key, url, total, concurrency):
+        workers = ProcessPoolExecutor(
+            max_workers=concurrency,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_sync_worker,
+            initargs=(overrides, session_key),
+        )
+        with workers:
+            # starts every worker and its first render before timing
+            list(workers.map(fetch_sync, [url] * concurrency))
+            started = time.perf_counter()
+            latencies = list(workers.map(fetch_sync, [url] * total))
+        return summarize(latencies, time.perf_counter() - started)
+
+    # the ASGI path: one event loop, renders spread over the process pool
+    async def run_async(self, client, url, total, concurrency):
+        async_client = AsyncClient()
+        async_client.cookies = client.cookies
+        slots = asyncio.Semaphore(concurrency)
+
+        async def fetch(_):
+            async with slots:
+                started = time.perf_counter()
+                response = await async_client.get(url)
+                if response.status_code != 200:
+                    raise RuntimeError(f"Async chart returned {response.status_code}")
+                return time.perf_counter() - started
+
+        # starts every pool worker before timing
+        await asyncio.gather(*[fetch(number) for number in range(concurrency)])
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*[fetch(number) for number in range(total)])
+        return summarize(latencies, time.perf_counter() - started)
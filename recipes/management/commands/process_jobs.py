@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from recipes.jobs import HEARTBEAT_INTERVAL, requeue_stale_jobs, run_next_job
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs, such as picture renditions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no job is due instead of polling",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls of an empty queue",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=600,
+            help=(
+                "Seconds without a heartbeat after which a running job is assumed "
+                "lost and requeued"
+            ),
+        )
+        parser.add_argument(
+            "--same-host",
+            action="store_true",
+            help=(
+                "Run with uploads on the local filesystem; only correct when this "
+                "worker shares that filesystem with the web process"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        # jobs read the pictures the web process stored; a worker on another host
+        # (such as a separate Heroku dyno) can't see a local MEDIA_ROOT
+        if isinstance(default_storage, FileSystemStorage) and not options["same_host"]:
+            raise CommandError(
+                "Uploads are stored in MEDIA_ROOT on the web host. Run this worker "
+                "on the same host with --same-host, or configure shared storage "
+                "(STORAGES['default'], e.g. S3) first."
+            )
+
+        stale_after = timedelta(seconds=options["stale_after"])
+        # a few missed heartbeats, not one slow write, make a job stale
+        if stale_after < 3 * HEARTBEAT_INTERVAL:
+            raise CommandError(
+                f"--stale-after must be at least "
+                f"{int(3 * HEARTBEAT_INTERVAL.total_seconds())} seconds, three "
+                f"heartbeats of a running job."
+            )
+
+        while True:
+            requeue_stale_jobs(stale_after)
+
+            # drains every due job before polling again
+            while True:
+                job = run_next_job()
+                if job is None:
+                    break
+                self.stdout.write(f"{job} after {job.attempts} attempt(s)")
+
+            if options["once"]:
+                return
+            close_old_connections()
+            time.sleep(options["sleep"])
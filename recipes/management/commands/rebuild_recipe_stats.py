@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.stats import rebuild_statistics
+
+
+class Command(BaseCommand):
+    help = "Recounts the pre-aggregated recipe statistics from the recipe table"
+
+    def handle(self, *args, **options):
+        statistics = rebuild_statistics()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {len(statistics)} statistic buckets")
+        )
@@ -0,0 +1,98 @@
+import pstats
+import sysconfig
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.profiling import POOL_FUNCTION, PROFILE_SUFFIX, profile_directory
+
+LIBRARY_PATHS = sorted(
+    {sysconfig.get_paths()["purelib"], sysconfig.get_paths()["platlib"]},
+    key=len,
+    reverse=True,
+)
+STDLIB_PATH = sysconfig.get_paths()["stdlib"]
+
+
+# what a function belongs to: "django.db", "matplotlib", "recipes", "stdlib"...
+def component(filename):
+    path = str(filename)
+    if path == "~":
+        return "builtins"
+    if path == POOL_FUNCTION[0]:
+        return "chart pool"
+    for root in LIBRARY_PATHS:
+        if path.startswith(root):
+            parts = Path(path[len(root) :].lstrip("/\\")).with_suffix("").parts
+            # Django is split by area so the ORM stands out from templates
+            return ".".join(parts[:2]) if parts[0] == "django" else parts[0]
+    if path.startswith(str(settings.BASE_DIR)):
+        return Path(path).relative_to(settings.BASE_DIR).parts[0]
+    if path.startswith(STDLIB_PATH):
+        return "stdlib"
+    return "other"
+
+
+def describe(function):
+    filename, line, name = function
+    if filename == "~":
+        return name
+    return f"{Path(filename).name}:{line}({name})"
+
+
+class Command(BaseCommand):
+    help = (
+        "Adds up the profiles written by ProfilingMiddleware and lists the "
+        "functions with the most cumulative time, and self time per package"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", help="Profile directory, PROFILING_DIR by default")
+        parser.add_argument(
+            "--match",
+            default="",
+            help="Only profiles whose file name contains this, e.g. search or slow",
+        )
+        parser.add_argument("--limit", type=int, default=25, help="Functions to list")
+
+    def handle(self, *args, **options):
+        directory = Path(options["dir"]) if options["dir"] else profile_directory()
+        paths = sorted(
+            path
+            for path in directory.glob(f"*{PROFILE_SUFFIX}")
+            if options["match"] in path.name
+        )
+        if not paths:
+            raise CommandError(f"No profiles in {directory}")
+
+        stats = pstats.Stats(*map(str, paths))
+        functions = stats.stats
+
+        self.stdout.write(
+            f"{len(paths)} profiles, {stats.total_tt:.2f}s of profiled time\n"
+        )
+        self.stdout.write(f"{'cumulative s':>12} {'self s':>8} {'calls':>9}  function")
+        ranked = sorted(functions.items(), key=lambda item: item[1][3], reverse=True)
+        for function, (_, calls, total, cumulative, _) in ranked[: options["limit"]]:
+            self.stdout.write(
+                f"{cumulative:>12.3f} {total:>8.3f} {calls:>9}  {describe(function)}"
+            )
+
+        # self time adds up without double counting, so it splits cleanly by
+        # package; built-ins such as a database driver's execute() count
+        # towards the package that calls them most
+        by_component = defaultdict(float)
+        for function, (_, _, total, _, callers) in functions.items():
+            if function[0] == "~" and callers:
+                function = max(callers, key=lambda caller: callers[caller][3])
+            by_component[component(function[0])] += total
+        self.stdout.write(f"\n{'self s':>12} {'share':>8}  package")
+        for name, total in sorted(
+            by_component.items(), key=lambda item: item[1], reverse=True
+        ):
+            if total < 0.0005:
+                break
+            share = total / stats.total_tt if stats.total_tt else 0
+            self.stdout.write(f"{total:>12.3f} {share:>8.1%}  {name}")
@@ -0,0 +1,255 @@
+import cProfile
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.signals import connection_created
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .profiling import add_pool_time, get_sampler, samples_to_stats, save_profile
+from .timing import RequestMetrics, current_metrics, install_query_timer
+
+logger = logging.getLogger("recipes.timing")
+profiling_logger = logging.getLogger("recipes.profiling")
+
+# metric name: Server-Timing description, in header order
+SERVER_TIMING_METRICS = {
+    "db": "Database",
+    "chart": "Chart rendering",
+    "template": "Templates",
+}
+
+
+# Server-Timing header value: total first, then the metrics the request used
+def server_timing(metrics, total):
+    entries = [f'total;dur={total * 1000:.1f};desc="Total"']
+    for name, description in SERVER_TIMING_METRICS.items():
+        if name in metrics.counts:
+            entries.append(
+                f"{name};dur={metrics.durations[name] * 1000:.1f};"
+                f'desc="{description} ({metrics.counts[name]}x)"'
+            )
+    return ", ".join(entries)
+
+
+# one logfmt line per request; the same fields go to extra for JSON formatters
+def log_request(request, response, metrics, total):
+    fields = {
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "total_ms": round(total * 1000, 1),
+    }
+    for name in SERVER_TIMING_METRICS:
+        fields[f"{name}_ms"] = round(metrics.durations.get(name, 0) * 1000, 1)
+        fields[f"{name}_count"] = metrics.counts.get(name, 0)
+    logger.info(
+        " ".join(f"{key}={value}" for key, value in fields.items()),
+        extra={"timing": fields},
+    )
+
+
+# records database, chart and template time per request, see recipes/timing.py,
+# and reports it in a Server-Timing header and a log line; without
+# REQUEST_TIMING it removes itself from the middleware chain
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_TIMING", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install_query_timer(connection)
+        # connections opened later, such as those of sync_to_async threads
+        connection_created.connect(install_query_timer, dispatch_uid="query_timer")
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        install_query_timer(connection)
+        token = current_metrics.set(RequestMetrics())
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            return self.finish(request, response, started)
+        finally:
+            current_metrics.reset(token)
+
+    async def __acall__(self, request):
+        token = current_metrics.set(RequestMetrics())
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            return self.finish(request, response, started)
+        finally:
+            current_metrics.reset(token)
+
+    # streaming responses are timed up to their first byte
+    def finish(self, request, response, started):
+        metrics = current_metrics.get()
+        total = time.perf_counter() - started
+        response["Server-Timing"] = server_timing(metrics, total)
+        log_request(request, response, metrics, total)
+        return response
+
+
+# profiles a PROFILING_SAMPLE_RATE fraction of requests with cProfile, and any
+# request slower than PROFILING_SLOW_MS with a stack sampler, into
+# PROFILING_DIR; see manage.py summarize_profiles. Under ASGI every request
+# runs its sync code (sync views, the ORM, templates) in a thread of its own,
+# see asgiref's ThreadSensitiveContext, and that thread is what gets profiled;
+# coroutines on the event loop are shared by all requests and are left out.
+# Renders in the chart pool run in other processes and aren't profiled either,
+# but the time spent waiting for them is added as one "<chart pool>" entry
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0)
+        self.slow = getattr(settings, "PROFILING_SLOW_MS", 0) / 1000
+        if not self.sample_rate and not self.slow:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.interval = getattr(settings, "PROFILING_INTERVAL_MS", 5) / 1000
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.measure()
+        try:
+            if random.random() < self.sample_rate:
+                return self.traced(request)
+            if self.slow:
+                return self.sampled(request)
+            return self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+    async def __acall__(self, request):
+        token = self.measure()
+        try:
+            if random.random() < self.sample_rate:
+                return await self.atraced(request)
+            if self.slow:
+                return await self.asampled(request)
+            return await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+    # the timers of recipes/timing.py record the chart pool wait into the
+    # request's metrics, which are only there when REQUEST_TIMING is set
+    def measure(self):
+        return current_metrics.set(current_metrics.get() or RequestMetrics())
+
+    # deterministic profile of every call, for the sampled fraction
+    def traced(self, request):
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            return self.get_response(request)
+        finally:
+            profile.disable()
+            profile.create_stats()
+            self.save(profile.stats, request, time.perf_counter() - started, "sampled")
+
+    # cheap stack samples, only kept if the request turns out slow
+    def sampled(self, request):
+        sampler = get_sampler(self.interval)
+        ident = threading.get_ident()
+        sampler.start_thread(ident)
+        started = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            samples = sampler.stop_thread(ident)
+            if elapsed >= self.slow and samples:
+                self.save(
+                    samples_to_stats(samples, self.interval), request, elapsed, "slow"
+                )
+
+    # cProfile only follows the thread that enables it, so it is switched on and
+    # off in the request's sync thread
+    async def atraced(self, request):
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        await sync_to_async(profile.enable)()
+        try:
+            return await self.get_response(request)
+        finally:
+            await sync_to_async(profile.disable)()
+            profile.create_stats()
+            await sync_to_async(self.save, thread_sensitive=False)(
+                profile.stats, request, time.perf_counter() - started, "sampled"
+            )
+
+    async def asampled(self, request):
+        sampler = get_sampler(self.interval)
+        ident = await sync_to_async(threading.get_ident)()
+        sampler.start_thread(ident)
+        started = time.perf_counter()
+        try:
+            return await self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            samples = sampler.stop_thread(ident)
+            if elapsed >= self.slow and samples:
+                await sync_to_async(self.save, thread_sensitive=False)(
+                    samples_to_stats(samples, self.interval), request, elapsed, "slow"
+                )
+
+    # a profile that can't be written never fails the request
+    def save(self, stats, request, elapsed, reason):
+        try:
+            add_pool_time(stats, current_metrics.get())
+            path = save_profile(stats, request, elapsed, reason)
+        except OSError:
+            profiling_logger.warning("Could not save profile", exc_info=True)
+        else:
+            profiling_logger.info(
+                "%s %s took %.0f ms, profile saved to %s",
+                request.method,
+                request.path,
+                elapsed * 1000,
+                path,
+            )
+
+
+# WhiteNoise's middleware is sync only, which would put the rest of the chain
+# in a thread under ASGI; this one serves static files the same way but also
+# runs on the event loop, looking files up there and opening them in a thread
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # autorefresh, on in DEBUG, looks on disk; otherwise it is a dict lookup
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
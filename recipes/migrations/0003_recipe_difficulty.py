@@ -0,0 +1,43 @@
+# Generated by Django 4.2.14 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+# same rules as recipes.models.calculate_difficulty, frozen for this migration
+def calculate_difficulty(cooking_time, number_of_ingredients):
+    if cooking_time < 10 and number_of_ingredients < 4:
+        return "Easy"
+    elif cooking_time < 10 and number_of_ingredients >= 4:
+        return "Medium"
+    elif cooking_time >= 10 and number_of_ingredients < 4:
+        return "Intermediate"
+    elif cooking_time >= 10 and number_of_ingredients >= 4:
+        return "Hard"
+    return "Unknown"
+
+
+def backfill_difficulty(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    recipes = list(Recipe.objects.only("id", "ingredients", "cooking_time"))
+    for recipe in recipes:
+        recipe.difficulty = calculate_difficulty(
+            recipe.cooking_time, len(recipe.ingredients.split(", "))
+        )
+    Recipe.objects.bulk_update(recipes, ["difficulty"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_recipe_pic'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='difficulty',
+            field=models.CharField(choices=[('Easy', 'Easy'), ('Medium', 'Medium'), ('Intermediate', 'Intermediate'), ('Hard', 'Hard')], db_index=True, default='', editable=False, max_length=20),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_difficulty, migrations.RunPython.noop),
+    ]
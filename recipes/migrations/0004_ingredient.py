@@ -0,0 +1,109 @@
+# Generated by Django 4.2.14 on 2026-10-18 10:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# same rules as recipes.models, frozen for this migration
+def parse_ingredients(ingredients):
+    names = []
+    for ingredient in ingredients.split(","):
+        name = ingredient.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def calculate_difficulty(cooking_time, number_of_ingredients):
+    if cooking_time < 10 and number_of_ingredients < 4:
+        return "Easy"
+    elif cooking_time < 10 and number_of_ingredients >= 4:
+        return "Medium"
+    elif cooking_time >= 10 and number_of_ingredients < 4:
+        return "Intermediate"
+    elif cooking_time >= 10 and number_of_ingredients >= 4:
+        return "Hard"
+    return "Unknown"
+
+
+def populate_ingredients(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+
+    recipes = list(Recipe.objects.only("id", "ingredients", "cooking_time"))
+    parsed = {recipe.id: parse_ingredients(recipe.ingredients) for recipe in recipes}
+
+    all_names = {name for names in parsed.values() for name in names}
+    Ingredient.objects.bulk_create(
+        [Ingredient(name=name) for name in sorted(all_names)],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+    ingredient_ids = dict(Ingredient.objects.values_list("name", "id"))
+
+    RecipeIngredient.objects.bulk_create(
+        [
+            RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_ids[name])
+            for recipe_id, names in parsed.items()
+            for name in names
+        ],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+
+    for recipe in recipes:
+        recipe.number_of_ingredients = len(parsed[recipe.id])
+        recipe.difficulty = calculate_difficulty(
+            recipe.cooking_time, recipe.number_of_ingredients
+        )
+    Recipe.objects.bulk_update(
+        recipes, ["number_of_ingredients", "difficulty"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_difficulty'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=225, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='number_of_ingredients',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='RecipeIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recipes.ingredient')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recipes.recipe')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_items',
+            field=models.ManyToManyField(blank=True, related_name='recipes', through='recipes.RecipeIngredient', to='recipes.ingredient'),
+        ),
+        migrations.AddIndex(
+            model_name='recipeingredient',
+            index=models.Index(fields=['ingredient', 'recipe'], name='recipes_rec_ingredi_bc6c07_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.UniqueConstraint(fields=('recipe', 'ingredient'), name='unique_recipe_ingredient'),
+        ),
+        migrations.RunPython(populate_ingredients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.14 on 2026-10-18 11:45
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# GIN index and trigger on PostgreSQL, FTS5 table and triggers on SQLite
+def install_search_backend(apps, schema_editor):
+    from recipes.search import install_search_backend
+
+    install_search_backend(schema_editor.connection)
+
+
+def uninstall_search_backend(apps, schema_editor):
+    from recipes.search import uninstall_search_backend
+
+    uninstall_search_backend(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_ingredient'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search_backend, uninstall_search_backend),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.14 on 2026-10-18 16:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+# recipes with renditions are ready, uploaded pictures without them are queued
+def set_renditions_status(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Job = apps.get_model("recipes", "Job")
+
+    Recipe.objects.exclude(pic_thumbnail="").update(renditions_status="ready")
+
+    pending = Recipe.objects.filter(pic_thumbnail="").exclude(pic="").exclude(pic="no_picture.jpg")
+    Job.objects.bulk_create(
+        [Job(task="renditions", payload={"recipe_id": pk}) for pk in pending.values_list("pk", flat=True)],
+        batch_size=1000,
+    )
+    pending.update(renditions_status="pending")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_pic_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='renditions_status',
+            field=models.CharField(choices=[('none', 'No picture'), ('pending', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', editable=False, max_length=10),
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=50)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx')],
+            },
+        ),
+        migrations.RunPython(set_renditions_status, migrations.RunPython.noop),
+    ]
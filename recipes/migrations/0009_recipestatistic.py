@@ -0,0 +1,73 @@
+# Generated by Django 4.2.14 on 2026-10-18 16:40
+
+from collections import Counter
+
+from django.db import migrations, models
+
+# the buckets as they were when this migration was written; a copy, so later
+# changes to recipes.stats don't change what this migration counts
+COOKING_TIME_BUCKETS = [
+    (0, 10, "Under 10 min"),
+    (10, 20, "10-19 min"),
+    (20, 30, "20-29 min"),
+    (30, 60, "30-59 min"),
+    (60, None, "60+ min"),
+]
+INGREDIENT_BUCKETS = [
+    (0, 4, "1-3"),
+    (4, 7, "4-6"),
+    (7, 10, "7-9"),
+    (10, None, "10+"),
+]
+
+
+def bucket_label(buckets, value):
+    for lower, upper, label in buckets:
+        if value >= lower and (upper is None or value < upper):
+            return label
+    return buckets[0][2]
+
+
+def recipe_buckets(difficulty, cooking_time, number_of_ingredients):
+    return [
+        ("difficulty", difficulty),
+        ("cooking_time", bucket_label(COOKING_TIME_BUCKETS, cooking_time)),
+        ("ingredients", bucket_label(INGREDIENT_BUCKETS, number_of_ingredients)),
+    ]
+
+
+# counts the existing recipes into their buckets
+def populate_statistics(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeStatistic = apps.get_model("recipes", "RecipeStatistic")
+
+    counts = Counter()
+    for values in Recipe.objects.values_list("difficulty", "cooking_time", "number_of_ingredients").iterator():
+        counts.update(recipe_buckets(*values))
+    RecipeStatistic.objects.bulk_create(
+        [RecipeStatistic(dimension=dimension, bucket=bucket, count=count) for (dimension, bucket), count in counts.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_job_renditions_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=20)),
+                ('bucket', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='recipestatistic',
+            constraint=models.UniqueConstraint(fields=('dimension', 'bucket'), name='unique_statistic_bucket'),
+        ),
+        migrations.RunPython(populate_statistics, migrations.RunPython.noop),
+    ]
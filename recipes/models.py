@@ -1,8 +1,87 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.shortcuts import reverse
+from django.utils import timezone
+from .images import DEFAULT_PICTURE, RENDITIONS
+
+# fields the pre-aggregated statistics are bucketed by, see recipes/stats.py
+STATISTICS_FIELDS = ("difficulty", "cooking_time", "number_of_ingredients")
+
+RENDITIONS_NONE = "none"
+RENDITIONS_PENDING = "pending"
+RENDITIONS_READY = "ready"
+RENDITIONS_FAILED = "failed"
+
+RENDITIONS_STATUS_CHOICES = [
+    (RENDITIONS_NONE, "No picture"),
+    (RENDITIONS_PENDING, "Processing"),
+    (RENDITIONS_READY, "Ready"),
+    (RENDITIONS_FAILED, "Failed"),
+]
+
+DIFFICULTY_CHOICES = [
+    ("Easy", "Easy"),
+    ("Medium", "Medium"),
+    ("Intermediate", "Intermediate"),
+    ("Hard", "Hard"),
+]
+
+
+# determine recipe difficulty from cooking time and number of ingredients
+def calculate_difficulty(cooking_time, number_of_ingredients):
+    if cooking_time < 10 and number_of_ingredients < 4:
+        return "Easy"
+    elif cooking_time < 10 and number_of_ingredients >= 4:
+        return "Medium"
+    elif cooking_time >= 10 and number_of_ingredients < 4:
+        return "Intermediate"
+    elif cooking_time >= 10 and number_of_ingredients >= 4:
+        return "Hard"
+    return "Unknown"
+
+
+# split a comma-joined ingredients string into normalized, unique ingredient names;
+# any comma separates, with or without a space, so "a,b,c,d" is four ingredients
+# (difficulty used to split on ", " only and counted it as one)
+def parse_ingredients(ingredients):
+    names = []
+    for ingredient in ingredients.split(","):
+        name = ingredient.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+class RecipeQuerySet(models.QuerySet):
+    # recipes that use the given ingredient, resolved through the indexed join table
+    def with_ingredient(self, name):
+        return self.filter(ingredient_items__name=name.strip().lower())
+
+    # recipes taking between minimum and maximum minutes, either bound optional
+    def with_cooking_time_between(self, minimum=None, maximum=None):
+        if minimum is not None:
+            self = self.filter(cooking_time__gte=minimum)
+        if maximum is not None:
+            self = self.filter(cooking_time__lte=maximum)
+        return self
+
+    # recipes that need at most the given number of ingredients
+    def with_max_ingredients(self, number_of_ingredients):
+        return self.filter(number_of_ingredients__lte=number_of_ingredients)
 
 
 # Create your models here.
+class Ingredient(models.Model):
+    name = models.CharField(max_length=225, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    # string representation
+    def __str__(self):
+        return str(self.name)
+
+
 class Recipe(models.Model):
     # class attributes
     name = models.CharField(max_length=50)
@@ -10,22 +89,120 @@ class Recipe(models.Model):
         max_length=225, help_text="Enter the ingredients, separated by a comma"
     )
     cooking_time = models.IntegerField(help_text="Enter cooking time in minutes")
-    difficulty = None
-    pic = models.ImageField(upload_to="recipes", default="no_picture.jpg")
-
-    # determine recipe difficulty
-    @property
-    def difficulty(self):
-        ingredients = self.ingredients.split(", ")
-        if self.cooking_time < 10 and len(ingredients) < 4:
-            return "Easy"
-        elif self.cooking_time < 10 and len(ingredients) >= 4:
-            return "Medium"
-        elif self.cooking_time >= 10 and len(ingredients) < 4:
-            return "Intermediate"
-        elif self.cooking_time >= 10 and len(ingredients) >= 4:
-            return "Hard"
-        return "Unknown"
+    # stored so difficulty searches can use an index instead of scanning in Python,
+    # the (difficulty, cooking_time) index below
+    difficulty = models.CharField(
+        max_length=20, choices=DIFFICULTY_CHOICES, editable=False
+    )
+    pic = models.ImageField(upload_to="recipes", default=DEFAULT_PICTURE)
+    # resized copies of pic with content-hashed names, see recipes/images.py
+    pic_thumbnail = models.ImageField(blank=True, editable=False)
+    pic_medium = models.ImageField(blank=True, editable=False)
+    pic_webp = models.ImageField(blank=True, editable=False)
+    # whether the background worker has produced the renditions yet
+    renditions_status = models.CharField(
+        max_length=10,
+        choices=RENDITIONS_STATUS_CHOICES,
+        default=RENDITIONS_NONE,
+        editable=False,
+    )
+    # denormalized from the ingredient table so counts don't need a join
+    number_of_ingredients = models.PositiveSmallIntegerField(
+        default=0, editable=False, db_index=True
+    )
+    ingredient_items = models.ManyToManyField(
+        Ingredient, through="RecipeIngredient", related_name="recipes", blank=True
+    )
+    # maintained by a database trigger on PostgreSQL, see recipes/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
+    # drives Last-Modified and ETags in the JSON API, see recipes/api.py
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # keyset pagination of the recipe list seeks on (name, id)
+            models.Index(fields=["name", "id"], name="recipe_name_id_idx"),
+            # difficulty alone or with a cooking time range: equality column first
+            models.Index(
+                fields=["difficulty", "cooking_time"], name="recipe_difficulty_time_idx"
+            ),
+            # cooking time ranges without a difficulty
+            models.Index(fields=["cooking_time"], name="recipe_cooking_time_idx"),
+        ]
+
+    # remembers the stored picture and ingredients so save() can tell when they
+    # were replaced
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "pic" in field_names:
+            instance._loaded_pic = values[field_names.index("pic")]
+        if "ingredients" in field_names:
+            instance._loaded_ingredients = values[field_names.index("ingredients")]
+        if set(STATISTICS_FIELDS).issubset(field_names):
+            instance._loaded_statistics = tuple(
+                values[field_names.index(field)] for field in STATISTICS_FIELDS
+            )
+        return instance
+
+    # keeps the derived columns in sync with ingredients and cooking time
+    def update_derived_fields(self):
+        self.number_of_ingredients = len(parse_ingredients(self.ingredients))
+        self.difficulty = calculate_difficulty(
+            self.cooking_time, self.number_of_ingredients
+        )
+
+    def save(self, *args, **kwargs):
+        self.update_derived_fields()
+        pic_changed = self.pic.name != getattr(self, "_loaded_pic", DEFAULT_PICTURE)
+        if pic_changed:
+            self.reset_renditions()
+        update_fields = kwargs.get("update_fields")
+        # saves that leave the ingredients alone, such as a picture change, keep
+        # their join table rows
+        ingredients_changed = (
+            update_fields is None or "ingredients" in update_fields
+        ) and self.ingredients != getattr(self, "_loaded_ingredients", None)
+        if update_fields is not None:
+            kwargs["update_fields"] = {
+                *update_fields,
+                "difficulty",
+                "number_of_ingredients",
+                "updated_at",
+            }
+            if pic_changed:
+                kwargs["update_fields"].update([*RENDITIONS, "renditions_status"])
+        # the row, its ingredient rows and its renditions job commit together, so
+        # a job is never lost and a failed job never leaves a half-saved recipe
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if ingredients_changed:
+                self.sync_ingredients()
+            if pic_changed and self.renditions_status == RENDITIONS_PENDING:
+                from .jobs import enqueue
+
+                enqueue("renditions", recipe_id=self.pk)
+        self._loaded_pic = self.pic.name
+        self._loaded_ingredients = self.ingredients
+
+    # forgets renditions of the previous picture; new ones are made by the worker
+    def reset_renditions(self):
+        for field in RENDITIONS:
+            setattr(self, field, "")
+        if self.pic and self.pic.name != DEFAULT_PICTURE:
+            self.renditions_status = RENDITIONS_PENDING
+        else:
+            self.renditions_status = RENDITIONS_NONE
+
+    # rewrites the join table rows from the ingredients string
+    def sync_ingredients(self):
+        names = parse_ingredients(self.ingredients)
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name) for name in names], ignore_conflicts=True
+        )
+        self.ingredient_items.set(Ingredient.objects.filter(name__in=names))
 
     # string representation
     def __str__(self):
@@ -34,3 +211,72 @@ class Recipe(models.Model):
     # primary key of recipe object becomes clickable
     def get_absolute_url(self):
         return reverse("recipes:detail", kwargs={"pk": self.pk})
+
+
+# join table between recipes and ingredients
+class RecipeIngredient(models.Model):
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "ingredient"], name="unique_recipe_ingredient"
+            )
+        ]
+        indexes = [models.Index(fields=["ingredient", "recipe"])]
+
+
+# number of recipes per bucket of a dimension, kept current by recipes/stats.py
+class RecipeStatistic(models.Model):
+    dimension = models.CharField(max_length=20)
+    bucket = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dimension", "bucket"], name="unique_statistic_bucket"
+            )
+        ]
+
+    # string representation
+    def __str__(self):
+        return f"{self.dimension} {self.bucket}: {self.count}"
+
+
+# a unit of background work, claimed and run by manage.py process_jobs
+class Job(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    task = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # workers look for the oldest due pending job
+            models.Index(
+                fields=["status", "run_after"], name="job_status_run_after_idx"
+            ),
+        ]
+
+    # string representation
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
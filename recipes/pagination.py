@@ -0,0 +1,94 @@
+import base64
+import json
+
+from django.db.models import Q
+
+
+# one page of results plus the cursors pointing either side of it
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+# cursors are the ordering values of a row, as URL-safe base64 JSON
+def encode_cursor(values):
+    payload = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, length):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as error:
+        raise ValueError("Invalid cursor") from error
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Invalid cursor")
+    # only the scalars encode_cursor writes; a list or object would reach the
+    # query as a lookup value and fail there with a TypeError
+    if not all(
+        isinstance(value, (str, int)) and not isinstance(value, bool)
+        for value in values
+    ):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+# rows strictly after (or before) the cursor row in the given ascending ordering,
+# e.g. for (name, id): name >= n AND (name > n OR (name = n AND id > i)); the
+# redundant bound on the leading column is what lets the database seek into the
+# index instead of scanning it from the start, for every page
+def keyset_filter(ordering, values, reverse=False):
+    lookup = "lt" if reverse else "gt"
+    condition = Q()
+    for position, field in enumerate(ordering):
+        equal = {ordering[index]: values[index] for index in range(position)}
+        condition |= Q(**equal, **{f"{field}__{lookup}": values[position]})
+    return Q(**{f"{ordering[0]}__{lookup}e": values[0]}) & condition
+
+
+def cursor_for(item, ordering):
+    return encode_cursor([getattr(item, field) for field in ordering])
+
+
+# seeks to the page after or before a cursor, so deep pages cost the same as the
+# first one; ordering must be unique, ascending and backed by an index
+def keyset_paginate(queryset, ordering, page_size, after=None, before=None):
+    if before:
+        values = decode_cursor(before, len(ordering))
+        descending = [f"-{field}" for field in ordering]
+        rows = list(
+            queryset.filter(keyset_filter(ordering, values, reverse=True)).order_by(
+                *descending
+            )[: page_size + 1]
+        )
+        has_previous = len(rows) > page_size
+        object_list = rows[:page_size][::-1]
+        has_next = True
+    else:
+        queryset = queryset.order_by(*ordering)
+        if after:
+            values = decode_cursor(after, len(ordering))
+            queryset = queryset.filter(keyset_filter(ordering, values))
+        rows = list(queryset[: page_size + 1])
+        has_next = len(rows) > page_size
+        object_list = rows[:page_size]
+        has_previous = bool(after)
+
+    if not object_list:
+        return KeysetPage(object_list)
+    return KeysetPage(
+        object_list,
+        next_cursor=cursor_for(object_list[-1], ordering) if has_next else None,
+        previous_cursor=cursor_for(object_list[0], ordering) if has_previous else None,
+    )
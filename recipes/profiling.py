@@ -0,0 +1,147 @@
+import marshal
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+PROFILE_SUFFIX = ".prof"
+
+# pseudo-function standing for the time a request waited on the chart pool,
+# whose worker processes no profiler in the web process can see
+POOL_FUNCTION = ("<chart pool>", 0, "render_chart")
+
+
+# where profiles go and how many are kept, see PROFILING_* in settings.py
+def profile_directory():
+    return Path(getattr(settings, "PROFILING_DIR", settings.BASE_DIR / "profiles"))
+
+
+def max_profiles():
+    return getattr(settings, "PROFILING_MAX_FILES", 200)
+
+
+# samples the stacks of registered threads at a fixed interval; requests only
+# turn out to be slow at the end, so they are sampled from the start and the
+# samples thrown away unless the request was slow
+class StackSampler(threading.Thread):
+    def __init__(self, interval):
+        super().__init__(name="request-stack-sampler", daemon=True)
+        self.interval = interval
+        self.lock = threading.Lock()
+        # thread id: Counter of stacks, outermost frame first
+        self.samples = {}
+
+    def start_thread(self, ident):
+        with self.lock:
+            self.samples[ident] = Counter()
+
+    def stop_thread(self, ident):
+        with self.lock:
+            return self.samples.pop(ident, Counter())
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.samples:
+                    continue
+                frames = sys._current_frames()
+                for ident, samples in self.samples.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[stack_of(frame)] += 1
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+# the process's sampler, started on first use
+def get_sampler(interval):
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = StackSampler(interval)
+            _sampler.start()
+        return _sampler
+
+
+# functions on the stack as pstats keys (file, first line, name), outermost first
+def stack_of(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+# turns stack samples into the dict cProfile dumps, so sampled and traced
+# profiles load the same way with pstats; "calls" are numbers of samples
+def samples_to_stats(samples, interval):
+    stats = {}
+    for stack, count in samples.items():
+        seconds = count * interval
+        seen = set()
+        for index, function in enumerate(stack):
+            calls, total, cumulative, callers = stats.get(function, (0, 0.0, 0.0, {}))
+            if index == len(stack) - 1:
+                total += seconds
+            # recursion counts once towards cumulative time
+            if function not in seen:
+                seen.add(function)
+                cumulative += seconds
+                calls += count
+            if index:
+                caller = stack[index - 1]
+                edge = callers.get(caller, (0, 0, 0.0, 0.0))
+                callers[caller] = (
+                    edge[0] + count,
+                    edge[1] + count,
+                    edge[2] + (seconds if index == len(stack) - 1 else 0.0),
+                    edge[3] + seconds,
+                )
+            stats[function] = (calls, total, cumulative, callers)
+    return {
+        function: (calls, calls, total, cumulative, callers)
+        for function, (calls, total, cumulative, callers) in stats.items()
+    }
+
+
+# adds the request's wait for chart pool renders, see recipes.chart_pool, to
+# its stats as POOL_FUNCTION
+def add_pool_time(stats, metrics):
+    if metrics is not None and metrics.counts.get("chart_pool"):
+        calls = metrics.counts["chart_pool"]
+        seconds = metrics.durations["chart_pool"]
+        stats[POOL_FUNCTION] = (calls, calls, seconds, seconds, {})
+    return stats
+
+
+# writes stats in the marshal format of cProfile's dump_stats, then removes the
+# oldest profiles above the limit
+def save_profile(stats, request, elapsed, reason):
+    directory = profile_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", request.path).strip("-") or "root"
+    name = (
+        f"{timezone.now():%Y%m%d-%H%M%S-%f}-{reason}-{request.method}-{slug[:60]}"
+        f"-{elapsed * 1000:.0f}ms{PROFILE_SUFFIX}"
+    )
+    path = directory / name
+    with open(path, "wb") as file:
+        marshal.dump(stats, file)
+    rotate_profiles(directory)
+    return path
+
+
+def rotate_profiles(directory):
+    profiles = sorted(directory.glob(f"*{PROFILE_SUFFIX}"))
+    for old in profiles[: max(0, len(profiles) - max_profiles())]:
+        old.unlink(missing_ok=True)
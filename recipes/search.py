@@ -0,0 +1,176 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+RECIPE_TABLE = "recipes_recipe"
+FTS_TABLE = "recipes_recipe_fts"
+
+# name matches rank above ingredient matches on both backends
+NAME_WEIGHT = 10.0
+INGREDIENTS_WEIGHT = 5.0
+
+# PostgreSQL: tsvector column kept current by a trigger, searched through a GIN index
+POSTGRES_INSTALL = [
+    f"""
+    CREATE OR REPLACE FUNCTION {RECIPE_TABLE}_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.ingredients, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"DROP TRIGGER IF EXISTS {RECIPE_TABLE}_search_vector_trigger ON {RECIPE_TABLE}",
+    f"""
+    CREATE TRIGGER {RECIPE_TABLE}_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, ingredients ON {RECIPE_TABLE}
+    FOR EACH ROW EXECUTE PROCEDURE {RECIPE_TABLE}_search_vector_update()
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS {RECIPE_TABLE}_search_vector_gin
+    ON {RECIPE_TABLE} USING gin (search_vector)
+    """,
+    f"UPDATE {RECIPE_TABLE} SET name = name",
+]
+
+POSTGRES_UNINSTALL = [
+    f"DROP INDEX IF EXISTS {RECIPE_TABLE}_search_vector_gin",
+    f"DROP TRIGGER IF EXISTS {RECIPE_TABLE}_search_vector_trigger ON {RECIPE_TABLE}",
+    f"DROP FUNCTION IF EXISTS {RECIPE_TABLE}_search_vector_update()",
+]
+
+# SQLite: external-content FTS5 table over the recipe table, kept current by triggers
+SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {RECIPE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, ingredients)
+        VALUES (new.id, new.name, new.ingredients);
+    END
+    """,
+    f"{FTS_TABLE}_ad": f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {RECIPE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, ingredients)
+        VALUES ('delete', old.id, old.name, old.ingredients);
+    END
+    """,
+    f"{FTS_TABLE}_au": f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, ingredients
+    ON {RECIPE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, ingredients)
+        VALUES ('delete', old.id, old.name, old.ingredients);
+        INSERT INTO {FTS_TABLE}(rowid, name, ingredients)
+        VALUES (new.id, new.name, new.ingredients);
+    END
+    """,
+}
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, ingredients, content='{RECIPE_TABLE}', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    *SQLITE_TRIGGERS.values(),
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    *[f"DROP TRIGGER IF EXISTS {name}" for name in SQLITE_TRIGGERS],
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def install_search_backend(connection):
+    if connection.vendor == "postgresql":
+        statements = POSTGRES_INSTALL
+    elif connection.vendor == "sqlite":
+        statements = SQLITE_INSTALL
+    else:
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def uninstall_search_backend(connection):
+    if connection.vendor == "postgresql":
+        statements = POSTGRES_UNINSTALL
+    elif connection.vendor == "sqlite":
+        statements = SQLITE_UNINSTALL
+    else:
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+# post_migrate receiver: SQLite drops triggers whenever a migration rebuilds
+# the recipe table, so put them back (and resync the index) if any are missing
+def ensure_search_backend(using="default", apps=None, **kwargs):
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    # nothing to restore when migrated back past the full-text migration
+    if apps is not None:
+        try:
+            apps.get_model("recipes", "Recipe")._meta.get_field("search_vector")
+        except (LookupError, FieldDoesNotExist):
+            return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+    if RECIPE_TABLE not in existing:
+        return
+    if FTS_TABLE not in existing or not existing.issuperset(SQLITE_TRIGGERS):
+        install_search_backend(connection)
+
+
+# turns free text into an FTS5 query: every word must match, as a prefix
+def build_fts5_query(text):
+    words = re.findall(r"\w+", text)
+    return " ".join('"{}"*'.format(word) for word in words)
+
+
+# ranked full-text search over recipe name and ingredients, best matches first
+def full_text_search(queryset, text):
+    connection = connections[queryset.db]
+
+    if connection.vendor == "postgresql":
+        query = SearchQuery(text, config="english", search_type="websearch")
+        return (
+            queryset.annotate(rank=SearchRank(F("search_vector"), query))
+            .filter(search_vector=query)
+            .order_by("-rank", "name")
+        )
+
+    if connection.vendor == "sqlite":
+        match = build_fts5_query(text)
+        if not match:
+            return queryset.none()
+        # bm25() is lower for better matches, so negate it to rank like Postgres
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, %s, %s) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {RECIPE_TABLE}.id",
+            (NAME_WEIGHT, INGREDIENTS_WEIGHT, match),
+        )
+        matches = RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,)
+        )
+        return (
+            queryset.filter(pk__in=matches)
+            .annotate(rank=rank)
+            .order_by("-rank", "name")
+        )
+
+    # other backends: unranked substring match so the search still works
+    return queryset.filter(
+        Q(name__icontains=text) | Q(ingredients__icontains=text)
+    ).order_by("name")
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Recipe, STATISTICS_FIELDS
+from .stats import update_statistics
+from .utils import get_chart_cache, invalidate_cached_user, invalidate_recipe_detail
+
+
+# any change to the catalog can change what a search plots, so drop cached charts
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_chart_cache(sender, **kwargs):
+    get_chart_cache().clear()
+
+
+# cached detail pages show the recipe, so drop them when it changes
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_detail_cache(sender, instance, **kwargs):
+    invalidate_recipe_detail(instance.pk)
+
+
+def statistics_values(recipe):
+    return tuple(getattr(recipe, field) for field in STATISTICS_FIELDS)
+
+
+# instances loaded with only() don't know their stored values, so read them first
+@receiver(pre_save, sender=Recipe)
+def load_statistics_values(sender, instance, **kwargs):
+    if instance.pk and not hasattr(instance, "_loaded_statistics"):
+        instance._loaded_statistics = (
+            Recipe.objects.filter(pk=instance.pk)
+            .values_list(*STATISTICS_FIELDS)
+            .first()
+        )
+
+
+# keeps the pre-aggregated statistics in step with every saved recipe
+@receiver(post_save, sender=Recipe)
+def update_statistics_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new_values = statistics_values(instance)
+    old_values = None if created else getattr(instance, "_loaded_statistics", None)
+    update_statistics(old_values, new_values)
+    instance._loaded_statistics = new_values
+
+
+@receiver(post_delete, sender=Recipe)
+def update_statistics_on_delete(sender, instance, **kwargs):
+    old_values = getattr(instance, "_loaded_statistics", statistics_values(instance))
+    update_statistics(old_values, None)
+
+
+# logged-in users are served from the cache, see recipes/backends.py; any change,
+# such as a new password or deactivation, must reach the next request. Queryset
+# update() sends no signal: call invalidate_cached_user for each changed user,
+# or the old copy stays cached for up to USER_CACHE_TIMEOUT
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
@@ -0,0 +1,187 @@
+// Minimal canvas charts for the search page: bar, line and pie.
+// Draws from plain arrays and thins out axis labels on large result sets.
+(function (global) {
+    "use strict";
+
+    var COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b"];
+    var MARGIN = { top: 20, right: 20, bottom: 90, left: 60 };
+    var FONT = "12px sans-serif";
+
+    // Sizes the canvas for the screen's pixel density and returns its context
+    function setup(canvas) {
+        var ratio = global.devicePixelRatio || 1;
+        var width = canvas.clientWidth || canvas.width;
+        var height = canvas.clientHeight || canvas.height;
+        canvas.width = width * ratio;
+        canvas.height = height * ratio;
+        var ctx = canvas.getContext("2d");
+        ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+        ctx.clearRect(0, 0, width, height);
+        ctx.font = FONT;
+        return { ctx: ctx, width: width, height: height };
+    }
+
+    // Rounds the axis maximum up to 1, 2 or 5 times a power of ten
+    function niceMax(value) {
+        if (value <= 0) {
+            return 1;
+        }
+        var power = Math.pow(10, Math.floor(Math.log10(value)));
+        var steps = [1, 2, 5, 10];
+        for (var i = 0; i < steps.length; i++) {
+            if (value <= steps[i] * power) {
+                return steps[i] * power;
+            }
+        }
+        return 10 * power;
+    }
+
+    // Draws both axes, y ticks, and every nth x label so they never overlap
+    function drawAxes(area, labels, max, options) {
+        var ctx = area.ctx;
+        var plotWidth = area.width - MARGIN.left - MARGIN.right;
+        var plotHeight = area.height - MARGIN.top - MARGIN.bottom;
+
+        ctx.strokeStyle = "#333";
+        ctx.fillStyle = "#333";
+        ctx.beginPath();
+        ctx.moveTo(MARGIN.left, MARGIN.top);
+        ctx.lineTo(MARGIN.left, MARGIN.top + plotHeight);
+        ctx.lineTo(MARGIN.left + plotWidth, MARGIN.top + plotHeight);
+        ctx.stroke();
+
+        ctx.textAlign = "right";
+        ctx.textBaseline = "middle";
+        for (var tick = 0; tick <= 5; tick++) {
+            var y = MARGIN.top + plotHeight - (plotHeight * tick) / 5;
+            ctx.fillText(String(Math.round((max * tick) / 5)), MARGIN.left - 6, y);
+        }
+
+        var slot = plotWidth / Math.max(labels.length, 1);
+        var every = Math.max(1, Math.ceil(16 / slot));
+        ctx.textBaseline = "top";
+        for (var i = 0; i < labels.length; i += every) {
+            ctx.save();
+            ctx.translate(MARGIN.left + slot * (i + 0.5), MARGIN.top + plotHeight + 6);
+            ctx.rotate(-Math.PI / 4);
+            ctx.fillText(String(labels[i]).slice(0, 14), 0, 0);
+            ctx.restore();
+        }
+
+        if (options.yLabel) {
+            ctx.save();
+            ctx.translate(14, MARGIN.top + plotHeight / 2);
+            ctx.rotate(-Math.PI / 2);
+            ctx.textAlign = "center";
+            ctx.fillText(options.yLabel, 0, 0);
+            ctx.restore();
+        }
+
+        return { plotWidth: plotWidth, plotHeight: plotHeight, slot: slot };
+    }
+
+    // Shows the label and value under the pointer as the canvas tooltip
+    function hover(canvas, labels, values, slot) {
+        canvas.addEventListener("mousemove", function (event) {
+            var x = event.offsetX - MARGIN.left;
+            var index = Math.floor(x / slot);
+            canvas.title = index >= 0 && index < labels.length ?
+                labels[index] + ": " + values[index] : "";
+        });
+    }
+
+    function bar(canvas, labels, values, options) {
+        var area = setup(canvas);
+        var max = niceMax(Math.max.apply(null, values.concat([0])));
+        var plot = drawAxes(area, labels, max, options || {});
+        var ctx = area.ctx;
+        var width = Math.max(1, plot.slot * 0.8);
+
+        ctx.fillStyle = COLORS[0];
+        for (var i = 0; i < values.length; i++) {
+            var height = (plot.plotHeight * values[i]) / max;
+            ctx.fillRect(
+                MARGIN.left + plot.slot * i + (plot.slot - width) / 2,
+                MARGIN.top + plot.plotHeight - height,
+                width,
+                height
+            );
+        }
+        hover(canvas, labels, values, plot.slot);
+    }
+
+    function line(canvas, labels, values, options) {
+        var area = setup(canvas);
+        var max = niceMax(Math.max.apply(null, values.concat([0])));
+        var plot = drawAxes(area, labels, max, options || {});
+        var ctx = area.ctx;
+
+        ctx.strokeStyle = COLORS[0];
+        ctx.fillStyle = COLORS[0];
+        ctx.beginPath();
+        for (var i = 0; i < values.length; i++) {
+            var x = MARGIN.left + plot.slot * (i + 0.5);
+            var y = MARGIN.top + plot.plotHeight - (plot.plotHeight * values[i]) / max;
+            if (i === 0) {
+                ctx.moveTo(x, y);
+            } else {
+                ctx.lineTo(x, y);
+            }
+        }
+        ctx.stroke();
+
+        // markers only while there is room for them
+        if (plot.slot >= 6) {
+            for (var j = 0; j < values.length; j++) {
+                ctx.beginPath();
+                ctx.arc(
+                    MARGIN.left + plot.slot * (j + 0.5),
+                    MARGIN.top + plot.plotHeight - (plot.plotHeight * values[j]) / max,
+                    3, 0, 2 * Math.PI
+                );
+                ctx.fill();
+            }
+        }
+        hover(canvas, labels, values, plot.slot);
+    }
+
+    function pie(canvas, labels, values) {
+        var area = setup(canvas);
+        var ctx = area.ctx;
+        var total = values.reduce(function (sum, value) { return sum + value; }, 0);
+        var radius = Math.min(area.width, area.height) / 2 - 30;
+        var centerX = area.width / 2;
+        var centerY = area.height / 2;
+        var angle = -Math.PI / 2;
+
+        ctx.textAlign = "center";
+        ctx.textBaseline = "middle";
+        for (var i = 0; i < values.length; i++) {
+            var slice = total ? (2 * Math.PI * values[i]) / total : 0;
+            ctx.fillStyle = COLORS[i % COLORS.length];
+            ctx.beginPath();
+            ctx.moveTo(centerX, centerY);
+            ctx.arc(centerX, centerY, radius, angle, angle + slice);
+            ctx.closePath();
+            ctx.fill();
+
+            var middle = angle + slice / 2;
+            var percent = total ? ((100 * values[i]) / total).toFixed(1) : "0.0";
+            ctx.fillStyle = "#fff";
+            ctx.fillText(
+                percent + "%",
+                centerX + Math.cos(middle) * radius * 0.6,
+                centerY + Math.sin(middle) * radius * 0.6
+            );
+            ctx.fillStyle = "#333";
+            ctx.fillText(
+                labels[i],
+                centerX + Math.cos(middle) * (radius + 16),
+                centerY + Math.sin(middle) * (radius + 16)
+            );
+            angle += slice;
+        }
+    }
+
+    global.MiniCharts = { bar: bar, line: line, pie: pie };
+})(window);
@@ -0,0 +1,146 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, Value, When
+
+from .models import Recipe, RecipeStatistic, DIFFICULTY_CHOICES
+
+# (lower bound, upper bound or None, label), lower bound inclusive
+COOKING_TIME_BUCKETS = [
+    (0, 10, "Under 10 min"),
+    (10, 20, "10-19 min"),
+    (20, 30, "20-29 min"),
+    (30, 60, "30-59 min"),
+    (60, None, "60+ min"),
+]
+INGREDIENT_BUCKETS = [
+    (0, 4, "1-3"),
+    (4, 7, "4-6"),
+    (7, 10, "7-9"),
+    (10, None, "10+"),
+]
+
+# dimension: (title, bucket labels in display order)
+DIMENSIONS = {
+    "difficulty": ("Difficulty", [value for value, _ in DIFFICULTY_CHOICES]),
+    "cooking_time": (
+        "Cooking Time",
+        [label for _, _, label in COOKING_TIME_BUCKETS],
+    ),
+    "ingredients": (
+        "Number of Ingredients",
+        [label for _, _, label in INGREDIENT_BUCKETS],
+    ),
+}
+
+
+def bucket_label(buckets, value):
+    for lower, upper, label in buckets:
+        if value >= lower and (upper is None or value < upper):
+            return label
+    return buckets[0][2]
+
+
+# the (dimension, bucket) pairs a recipe with these values is counted in
+def recipe_buckets(difficulty, cooking_time, number_of_ingredients):
+    return [
+        ("difficulty", difficulty),
+        ("cooking_time", bucket_label(COOKING_TIME_BUCKETS, cooking_time)),
+        ("ingredients", bucket_label(INGREDIENT_BUCKETS, number_of_ingredients)),
+    ]
+
+
+# adds delta to each bucket's count in place, creating missing rows
+def apply_delta(buckets, delta):
+    for dimension, bucket in buckets:
+        statistics = RecipeStatistic.objects.filter(dimension=dimension, bucket=bucket)
+        if statistics.update(count=F("count") + delta) or delta < 0:
+            continue
+        _, created = RecipeStatistic.objects.get_or_create(
+            dimension=dimension, bucket=bucket, defaults={"count": delta}
+        )
+        if not created:
+            # another save created the row since our update
+            statistics.update(count=F("count") + delta)
+
+
+# moves a recipe from its old buckets to its new ones; either side may be None
+def update_statistics(old_values, new_values):
+    old = recipe_buckets(*old_values) if old_values else []
+    new = recipe_buckets(*new_values) if new_values else []
+    apply_delta([bucket for bucket in old if bucket not in new], -1)
+    apply_delta([bucket for bucket in new if bucket not in old], 1)
+
+
+# SQL expression mapping a column to bucket labels, so rebuilds group in the database
+def bucket_case(field, buckets):
+    whens = []
+    for lower, upper, label in buckets:
+        condition = {f"{field}__gte": lower}
+        if upper is not None:
+            condition[f"{field}__lt"] = upper
+        whens.append(When(**condition, then=Value(label)))
+    return Case(*whens, default=Value(buckets[0][2]))
+
+
+# recounts every bucket from the recipe table in three grouped queries
+def rebuild_statistics():
+    groupings = {
+        "difficulty": F("difficulty"),
+        "cooking_time": bucket_case("cooking_time", COOKING_TIME_BUCKETS),
+        "ingredients": bucket_case("number_of_ingredients", INGREDIENT_BUCKETS),
+    }
+    statistics = []
+    for dimension, expression in groupings.items():
+        rows = (
+            Recipe.objects.order_by()
+            .annotate(bucket=expression)
+            .values("bucket")
+            .annotate(count=Count("id"))
+        )
+        statistics.extend(
+            RecipeStatistic(
+                dimension=dimension, bucket=row["bucket"], count=row["count"]
+            )
+            for row in rows
+        )
+
+    with transaction.atomic():
+        RecipeStatistic.objects.all().delete()
+        RecipeStatistic.objects.bulk_create(statistics)
+    return statistics
+
+
+def statistics_rows():
+    return RecipeStatistic.objects.values_list("dimension", "bucket", "count")
+
+
+# every dimension with its buckets in display order, from (dimension, bucket, count) rows
+def build_dashboard(rows):
+    counts = {(dimension, bucket): count for dimension, bucket, count in rows}
+    dashboard = []
+    for dimension, (title, labels) in DIMENSIONS.items():
+        buckets = [(label, counts.get((dimension, label), 0)) for label in labels]
+        total = sum(count for _, count in buckets)
+        dashboard.append(
+            {
+                "title": title,
+                "total": total,
+                "buckets": [
+                    {
+                        "label": label,
+                        "count": count,
+                        "percent": round(100 * count / total) if total else 0,
+                    }
+                    for label, count in buckets
+                ],
+            }
+        )
+    return dashboard
+
+
+# the dashboard, read from the statistics table only
+def dashboard_statistics():
+    return build_dashboard(statistics_rows())
+
+
+async def adashboard_statistics():
+    return build_dashboard([row async for row in statistics_rows()])
@@ -0,0 +1,28 @@
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+RESULT_ROW = '<tr><th>{}</th><td><a href="{}">{}</a></td><td>{}</td><td>{}</td></tr>'
+
+
+# reverses the detail URL once, then fills in each primary key
+def detail_url_builder():
+    placeholder = "__pk__"
+    url = reverse("recipes:detail", kwargs={"pk": placeholder})
+    return lambda pk: url.replace(placeholder, str(pk))
+
+
+# renders (id, name, cooking_time, difficulty) rows, escaping every value
+@register.simple_tag
+def result_rows(results):
+    detail_url = detail_url_builder()
+    return format_html_join(
+        "\n",
+        RESULT_ROW,
+        (
+            (number, detail_url(id), name, cooking_time, difficulty)
+            for number, (id, name, cooking_time, difficulty) in enumerate(results, 1)
+        ),
+    )
@@ -1,9 +1,67 @@
-from django.test import TestCase, Client
-from .models import Recipe
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, Client, tag
+from .models import (
+    Recipe,
+    Ingredient,
+    RecipeIngredient,
+    Job,
+    RecipeStatistic,
+    RENDITIONS_NONE,
+    RENDITIONS_PENDING,
+    RENDITIONS_READY,
+)
 from django.urls import reverse
 from django.contrib.auth.models import User
 from .forms import RecipesSearchForm, AddRecipeForm
+from .search import full_text_search
+from .utils import (
+    get_chart,
+    get_chart_cache,
+    get_view_cache,
+    get_user_cache,
+    user_cache_key,
+    chart_fingerprint,
+    render_chart,
+)
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+from unittest import mock, skipUnless
+import gc
+import json
+import os
+import pstats
+import subprocess
+import sys
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .views import RecipeListView, CLIENT_CHART_THRESHOLD
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.utils.module_loading import import_string
+from io import BytesIO, StringIO
+from PIL import Image
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.http import http_date
+from .chart_pool import (
+    PoolLifespan,
+    aget_chart,
+    shutdown_pool,
+    submit_render,
+    warm_charts,
+)
+from .jobs import TASKS, claim_next_job, enqueue, requeue_stale_jobs, run_next_job
 from django.contrib.messages import get_messages
+from .stats import rebuild_statistics
+from .pagination import encode_cursor, keyset_filter
+from .profiling import POOL_FUNCTION
+from .checks import check_session_cache
 
 
 # Create your tests here.
@@ -65,7 +123,74 @@ class RecipeModelTest(TestCase):
         recipe = Recipe.objects.get(id=1)
 
         # compare the value to the expected result
-        self.assertEqual(recipe.difficulty(), "Easy")
+        self.assertEqual(recipe.difficulty, "Easy")
+
+    def test_difficulty_updated_on_save(self):
+        # get a recipe object to test
+        recipe = Recipe.objects.get(id=1)
+
+        # change cooking time and ingredients so the difficulty changes
+        recipe.cooking_time = 30
+        recipe.ingredients = "Tea leaves, Sugar, Water, Milk"
+        recipe.save()
+
+        # stored difficulty should be queryable with the new value
+        self.assertTrue(Recipe.objects.filter(id=1, difficulty="Hard").exists())
+
+    # INGREDIENT TABLE
+    def test_ingredients_normalized(self):
+        # get a recipe object to test
+        recipe = Recipe.objects.get(id=1)
+
+        # ingredients should be parsed into the join table and counted
+        names = list(recipe.ingredient_items.values_list("name", flat=True))
+        self.assertEqual(sorted(names), ["sugar", "tea leaves", "water"])
+        self.assertEqual(recipe.number_of_ingredients, 3)
+
+    def test_ingredient_lookups(self):
+        # create a second recipe sharing an ingredient
+        Recipe.objects.create(
+            name="Lemonade", ingredients="Lemon, Sugar, Water, Ice", cooking_time=5
+        )
+
+        # both recipes use sugar, only one needs 3 or fewer ingredients
+        self.assertEqual(Recipe.objects.with_ingredient("Sugar").count(), 2)
+        self.assertEqual(
+            list(Recipe.objects.with_max_ingredients(3).values_list("name", flat=True)),
+            ["Tea"],
+        )
+        self.assertEqual(Ingredient.objects.filter(name="sugar").count(), 1)
+
+    def test_ingredients_split_on_any_comma(self):
+        recipe = Recipe.objects.create(
+            name="Trail Mix", ingredients="Nuts,Raisins, Oats ,nuts", cooking_time=5
+        )
+
+        # spacing and case don't matter and repeats count once
+        self.assertEqual(recipe.number_of_ingredients, 3)
+        self.assertEqual(recipe.difficulty, "Easy")
+
+    def test_ingredient_links_only_resync_when_ingredients_change(self):
+        recipe = Recipe.objects.get(name="Tea")
+        recipe.cooking_time = 12
+        with CaptureQueriesContext(connection) as queries:
+            recipe.save()
+        # just the recipe row, not the ingredient or join tables
+        tables = ("recipes_ingredient", "recipes_recipeingredient")
+        self.assertFalse(
+            any(
+                table in query["sql"]
+                for query in queries.captured_queries
+                for table in tables
+            )
+        )
+
+        recipe.ingredients = "Tea leaves, Water"
+        recipe.save()
+        self.assertEqual(
+            sorted(recipe.ingredient_items.values_list("name", flat=True)),
+            ["tea leaves", "water"],
+        )
 
     # URL
     def test_get_absolute_url(self):
@@ -225,6 +350,1365 @@ class RecipeViewTest(TestCase):
         # check if response contains the first recipe name
         self.assertContains(response, "Recipe 1")
 
+    def test_search_view_by_difficulty(self):
+        # log test user in
+        self.client.login(username="testuser", password="12345")
+
+        # create a recipe with a different difficulty
+        Recipe.objects.create(name="Quick Snack", ingredients="Bread", cooking_time=2)
+
+        # send POST request to search view filtering by difficulty
+        response = self.client.post(
+            reverse("recipes:search"),
+            data={
+                "search_by": "difficulty",
+                "search_term": "",
+                "cooking_time": "",
+                "difficulty": "Easy",
+            },
+        )
+
+        # only the easy recipe should be in the results
+        self.assertContains(response, "Quick Snack")
+        self.assertNotContains(response, "Recipe 1")
+
+    def test_search_view_by_ingredient(self):
+        # log test user in
+        self.client.login(username="testuser", password="12345")
+
+        # create a recipe with a distinct ingredient
+        Recipe.objects.create(
+            name="Pasta", ingredients="Pasta, Tomato sauce", cooking_time=15
+        )
+
+        # send POST request to search view filtering by ingredient
+        response = self.client.post(
+            reverse("recipes:search"),
+            data={"search_by": "ingredient", "search_term": "tomato sauce"},
+        )
+
+        # only the recipe using that ingredient should be in the results
+        self.assertContains(response, "Pasta")
+        self.assertNotContains(response, "Recipe 1")
+
+
+class FullTextSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # create recipes matching "tomato" in the name or only in the ingredients
+        cls.soup = Recipe.objects.create(
+            name="Tomato Soup", ingredients="Tomatoes, Salt, Water", cooking_time=25
+        )
+        cls.pasta = Recipe.objects.create(
+            name="Pasta", ingredients="Pasta, Tomato sauce", cooking_time=15
+        )
+        cls.tea = Recipe.objects.create(
+            name="Tea", ingredients="Tea leaves, Sugar, Water", cooking_time=5
+        )
+
+    def search(self, text):
+        return list(
+            full_text_search(Recipe.objects.all(), text).values_list("name", flat=True)
+        )
+
+    def test_name_matches_rank_first(self):
+        # both recipes match, the one with the term in its name ranks higher
+        self.assertEqual(self.search("tomato"), ["Tomato Soup", "Pasta"])
+
+    def test_searches_ingredients(self):
+        # a term only found in ingredients still matches
+        self.assertEqual(self.search("sugar"), ["Tea"])
+
+    def test_all_words_must_match(self):
+        # every word in the query must be present
+        self.assertEqual(self.search("tomato water"), ["Tomato Soup"])
+
+    def test_index_follows_updates_and_deletes(self):
+        # renamed recipes are found by their new name
+        self.tea.name = "Green Tea"
+        self.tea.ingredients = "Green tea leaves, Water"
+        self.tea.save()
+        self.assertEqual(self.search("green"), ["Green Tea"])
+        self.assertEqual(self.search("sugar"), [])
+
+        # deleted recipes disappear from the results
+        self.pasta.delete()
+        self.assertEqual(self.search("tomato"), ["Tomato Soup"])
+
+    def test_search_view_full_text(self):
+        # log a test user in
+        User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+
+        # send POST request to search view with a keyword query
+        response = self.client.post(
+            reverse("recipes:search"),
+            data={"search_by": "full_text", "search_term": "tomato"},
+        )
+
+        # recipes matching by name or ingredient are listed, others are not
+        self.assertContains(response, "Tomato Soup")
+        self.assertContains(response, "Pasta")
+        self.assertNotContains(response, "Tea")
+
+    def test_query_without_words(self):
+        # punctuation alone matches nothing instead of raising
+        self.assertEqual(self.search('"*'), [])
+
+
+class CombinedSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Recipe.objects.create(
+            name="Quick Pasta", ingredients="Pasta, Oil", cooking_time=8
+        )
+        Recipe.objects.create(
+            name="Baked Pasta", ingredients="Pasta, Cheese", cooking_time=40
+        )
+        Recipe.objects.create(name="Pasta Salad", ingredients="Pasta", cooking_time=15)
+        Recipe.objects.create(
+            name="Rice Bowl", ingredients="Rice, Egg", cooking_time=12
+        )
+
+    def search(self, **data):
+        form = RecipesSearchForm(data=data)
+        self.assertTrue(form.is_valid(), form.errors)
+        return sorted(form.get_queryset().values_list("name", flat=True))
+
+    def test_criteria_combine_in_one_query(self):
+        with self.assertNumQueries(1):
+            names = self.search(
+                search_by="combined",
+                ingredient="pasta",
+                difficulty="Intermediate",
+                max_cooking_time=20,
+            )
+        self.assertEqual(names, ["Pasta Salad"])
+
+        # a name and a range alone
+        self.assertEqual(
+            self.search(search_by="combined", search_term="pasta", min_cooking_time=10),
+            ["Baked Pasta", "Pasta Salad"],
+        )
+
+    def test_cooking_time_range_and_exact(self):
+        self.assertEqual(
+            self.search(
+                search_by="cooking_time", min_cooking_time=10, max_cooking_time=15
+            ),
+            ["Pasta Salad", "Rice Bowl"],
+        )
+        self.assertEqual(
+            self.search(search_by="cooking_time", cooking_time=8), ["Quick Pasta"]
+        )
+
+    def test_inverted_range_is_invalid(self):
+        form = RecipesSearchForm(
+            data={
+                "search_by": "combined",
+                "min_cooking_time": 30,
+                "max_cooking_time": 10,
+            }
+        )
+        self.assertFalse(form.is_valid())
+
+    @skipUnless(connection.vendor == "sqlite", "reads SQLite query plans")
+    def test_common_combinations_use_indexes(self):
+        combinations = {
+            "recipe_difficulty_time_idx": {
+                "search_by": "combined",
+                "difficulty": "Easy",
+                "max_cooking_time": 20,
+            },
+            "recipe_cooking_time_idx": {
+                "search_by": "cooking_time",
+                "min_cooking_time": 10,
+                "max_cooking_time": 20,
+            },
+        }
+        for index, data in combinations.items():
+            form = RecipesSearchForm(data=data)
+            self.assertTrue(form.is_valid())
+            plan = form.get_queryset().explain()
+            self.assertIn(f"USING INDEX {index}", plan)
+            self.assertNotIn("SCAN recipes_recipe", plan)
+
+        # an ingredient joins through indexes only
+        form = RecipesSearchForm(
+            data={
+                "search_by": "combined",
+                "ingredient": "pasta",
+                "difficulty": "Easy",
+                "max_cooking_time": 20,
+            }
+        )
+        self.assertTrue(form.is_valid())
+        self.assertNotIn("SCAN", form.get_queryset().explain())
+
+
+class ChartCacheTest(TestCase):
+    def setUp(self):
+        # start every test from an empty chart cache
+        get_chart_cache().clear()
+        self.data = {
+            "name": ["Tea", "Coffee"],
+            "cooking_time": [5, 3],
+            "difficulty": ["Easy", "Easy"],
+            "number_of_ingredients": [3, 2],
+        }
+
+    def test_identical_data_renders_once(self):
+        with mock.patch("recipes.utils.render_chart", return_value="png") as render:
+            self.assertEqual(get_chart("#1", self.data), "png")
+            self.assertEqual(get_chart("#1", dict(self.data)), "png")
+
+        # second call is served from the cache
+        self.assertEqual(render.call_count, 1)
+
+    def test_key_depends_on_chart_type_and_plotted_data(self):
+        # same data, different chart types get different keys
+        self.assertNotEqual(
+            chart_fingerprint("#1", self.data), chart_fingerprint("#3", self.data)
+        )
+
+        # columns the pie chart does not plot don't change its key
+        changed = dict(self.data, cooking_time=[50, 30])
+        self.assertEqual(
+            chart_fingerprint("#2", self.data), chart_fingerprint("#2", changed)
+        )
+        self.assertNotEqual(
+            chart_fingerprint("#1", self.data), chart_fingerprint("#1", changed)
+        )
+
+    def test_recipe_changes_invalidate_cache(self):
+        with mock.patch("recipes.utils.render_chart", return_value="png") as render:
+            get_chart("#2", self.data)
+
+            # saving a recipe drops cached charts
+            recipe = Recipe.objects.create(
+                name="Tea", ingredients="Tea leaves, Water", cooking_time=5
+            )
+            get_chart("#2", self.data)
+            self.assertEqual(render.call_count, 2)
+
+            # so does deleting one
+            recipe.delete()
+            get_chart("#2", self.data)
+            self.assertEqual(render.call_count, 3)
+
+
+class ChartRendererTest(SimpleTestCase):
+    data = {
+        "name": ["Tea", "Coffee", "Pasta"],
+        "cooking_time": [5, 3, 20],
+        "difficulty": ["Easy", "Easy", "Hard"],
+        "number_of_ingredients": [3, 2, 5],
+    }
+
+    # current resident set size in bytes
+    def resident_memory(self):
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    def test_renders_from_many_threads(self):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            charts = list(
+                pool.map(
+                    lambda chart_type: render_chart(chart_type, self.data),
+                    ["#1", "#2", "#3"] * 4,
+                )
+            )
+
+        # every render produces a complete PNG
+        for chart in charts:
+            self.assertTrue(chart.startswith(b"\x89PNG"))
+
+    def test_unknown_chart_type_is_an_error(self):
+        with self.assertRaises(ValueError):
+            render_chart("#9", self.data)
+
+    @tag("soak")
+    @skipUnless(os.path.exists("/proc/self/statm"), "needs /proc to read memory")
+    def test_memory_stays_flat_across_renders(self):
+        # thousands of renders, so a slow leak shows; only runs with --tag soak,
+        # and CHART_SOAK_RENDERS shortens or lengthens it
+        renders = int(os.environ.get("CHART_SOAK_RENDERS", 3000))
+        chart_types = ["#1", "#2", "#3"]
+
+        # let matplotlib fill its font and text caches first
+        for number in range(30):
+            render_chart(chart_types[number % 3], self.data)
+
+        # the allocator keeps growing its arenas for a while after warm-up, by an
+        # amount that depends on what ran earlier in the process, so compare two
+        # equal batches: a leak grows the second batch as much as the first
+        growth = []
+        for batch in range(2):
+            gc.collect()
+            baseline = self.resident_memory()
+            for number in range(renders // 2):
+                render_chart(chart_types[number % 3], self.data)
+            gc.collect()
+            growth.append(self.resident_memory() - baseline)
+
+        # a leaked figure costs hundreds of KB, so the settled batch must stay flat
+        self.assertLess(growth[1], 4 * 1024 * 1024)
+
+        # nothing was registered with pyplot's global figure manager
+        pyplot = sys.modules.get("matplotlib.pyplot")
+        if pyplot is not None:
+            self.assertEqual(pyplot.get_fignums(), [])
+
+
+class ImportTimeTest(SimpleTestCase):
+    # heavy libraries that must only load when a chart or analytics export is requested
+    LAZY_MODULES = ("pandas", "matplotlib")
+
+    def boot(self, entry_point):
+        # imports the server entry point and URLconf in a fresh interpreter, then
+        # prints the lazy modules it loaded and the child processes it started
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                f"import multiprocessing, sys, {entry_point}, recipe_project.urls; "
+                "print(len(multiprocessing.active_children()), *sorted("
+                "name for name in sys.modules "
+                f"if name.split('.')[0] in {self.LAZY_MODULES!r}))",
+            ],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        children, *loaded = result.stdout.split()
+        return int(children), loaded
+
+    def test_cold_start_loads_no_heavy_modules(self):
+        # the Procfile serves ASGI; WSGI still works
+        for entry_point in ["recipe_project.asgi", "recipe_project.wsgi"]:
+            with self.subTest(entry_point=entry_point):
+                children, loaded = self.boot(entry_point)
+
+                # neither pandas nor matplotlib is imported at boot; the chart
+                # workers load matplotlib in their own processes
+                self.assertEqual(loaded, [])
+
+                # and those only start with the server, not on import
+                self.assertEqual(children, 0)
+
+    async def test_chart_pool_starts_and_stops_with_the_server(self):
+        application = mock.AsyncMock()
+        messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        with mock.patch("recipes.chart_pool.warm_pool") as warm, mock.patch(
+            "recipes.chart_pool.shutdown_pool"
+        ) as shutdown:
+            await PoolLifespan(application)({"type": "lifespan"}, receive, send)
+        warm.assert_called_once_with()
+        shutdown.assert_called_once_with()
+        self.assertEqual(
+            sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        )
+
+        # requests go straight to Django
+        await PoolLifespan(application)({"type": "http"}, receive, send)
+        application.assert_awaited_once_with({"type": "http"}, receive, send)
+
+
+class ChartViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # create test user and recipes
+        cls.user = User.objects.create_user(username="testuser", password="12345")
+        Recipe.objects.create(
+            name="Tea", ingredients="Tea leaves, Sugar, Water", cooking_time=5
+        )
+        Recipe.objects.create(
+            name="Coffee", ingredients="Coffee, Water", cooking_time=3
+        )
+
+    def setUp(self):
+        # initialize test client, log test user in and start with no cached charts
+        self.client = Client()
+        self.client.login(username="testuser", password="12345")
+        get_chart_cache().clear()
+        self.url = reverse("recipes:chart", kwargs={"kind": "bar", "fmt": "png"})
+
+    def test_chart_is_served_as_png(self):
+        response = self.client.get(self.url, {"search_by": "name", "search_term": "e"})
+
+        # raw image bytes with validators and caching headers
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+        self.assertIn("ETag", response)
+        self.assertIn("max-age", response["Cache-Control"])
+
+    def test_chart_as_svg(self):
+        url = reverse("recipes:chart", kwargs={"kind": "pie", "fmt": "svg"})
+        response = self.client.get(url, {"search_by": "name", "search_term": "e"})
+        self.assertEqual(response["Content-Type"], "image/svg+xml")
+
+    def test_unchanged_chart_revalidates_with_304(self):
+        params = {"search_by": "name", "search_term": "e"}
+        etag = self.client.get(self.url, params)["ETag"]
+
+        # the same data answers If-None-Match without rendering
+        with mock.patch("recipes.utils.render_chart") as render:
+            response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        render.assert_not_called()
+
+        # a different result set gets a fresh image
+        response = self.client.get(
+            self.url,
+            {"search_by": "name", "search_term": "Tea"},
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_chart_and_invalid_criteria(self):
+        url = reverse("recipes:chart", kwargs={"kind": "radar", "fmt": "png"})
+        self.assertEqual(self.client.get(url, {"search_by": "name"}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {}).status_code, 400)
+
+    def test_search_page_links_chart_images(self):
+        response = self.client.post(
+            reverse("recipes:search"), data={"search_by": "name", "search_term": "Tea"}
+        )
+
+        # the page references the chart URLs instead of inlining image data
+        self.assertContains(
+            response, "/async/charts/bar.png?search_by=name&amp;search_term=Tea"
+        )
+        self.assertNotContains(response, "data:image/png;base64")
+
+    def test_async_chart_renders_in_pool(self):
+        self.addCleanup(shutdown_pool)
+        url = reverse("recipes:chart_async", kwargs={"kind": "bar", "fmt": "png"})
+        params = {"search_by": "name", "search_term": "e"}
+
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+
+        # the same ETag as the sync view, so either can revalidate
+        self.assertEqual(response["ETag"], self.client.get(self.url, params)["ETag"])
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_search_renders_charts_ahead_in_pool(self):
+        self.addCleanup(shutdown_pool)
+        warming = []
+
+        def warm(*args, **kwargs):
+            warming.extend(warm_charts(*args, **kwargs))
+            return warming
+
+        with mock.patch("recipes.views.warm_charts", side_effect=warm):
+            self.client.post(
+                reverse("recipes:search"),
+                data={"search_by": "name", "search_term": "e"},
+            )
+        self.assertEqual(len(warming), 3)
+        wait(warming, timeout=60)
+
+        # once the renders finish, every chart on the page is cached
+        with mock.patch("recipes.utils.render_chart") as render:
+            for kind in ["bar", "pie", "line"]:
+                url = reverse("recipes:chart", kwargs={"kind": kind, "fmt": "png"})
+                response = self.client.get(
+                    url, {"search_by": "name", "search_term": "e"}
+                )
+                self.assertTrue(response.content.startswith(b"\x89PNG"))
+        render.assert_not_called()
+
+    def test_search_does_not_wait_for_charts(self):
+        # renders that never finish
+        render = Future()
+        pool = mock.Mock(**{"submit.return_value": render})
+        with mock.patch("recipes.chart_pool.get_pool", return_value=pool):
+            response = self.client.post(
+                reverse("recipes:search"),
+                data={"search_by": "name", "search_term": "e"},
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(pool.submit.call_count, 3)
+
+            # the pending renders count towards the pool's limit until they end
+            render.set_result(b"\x89PNG")
+
+    def test_charts_are_not_warmed_without_pool(self):
+        data = {
+            "name": ["Tea"],
+            "cooking_time": [5],
+            "difficulty": ["Easy"],
+            "number_of_ingredients": [3],
+        }
+        with mock.patch(
+            "recipes.chart_pool.get_pool", side_effect=OSError("no processes")
+        ):
+            self.assertEqual(warm_charts(["#1", "#2"], data, "svg"), [])
+        with override_settings(CHART_POOL_WORKERS=0):
+            self.assertEqual(warm_charts(["#1", "#2"], data, "svg"), [])
+
+    def test_async_chart_sheds_load_when_pool_is_full(self):
+        url = reverse("recipes:chart_async", kwargs={"kind": "bar", "fmt": "png"})
+        with mock.patch("recipes.chart_pool.max_pending", return_value=0):
+            response = self.client.get(url, {"search_by": "name", "search_term": "e"})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+
+    async def test_chart_view_awaits_the_render_warming_it(self):
+        data = {
+            "name": ["Tea"],
+            "cooking_time": [5],
+            "difficulty": ["Easy"],
+            "number_of_ingredients": [3],
+        }
+        render = Future()
+        pool = mock.Mock(**{"submit.return_value": render})
+        submitted = []
+
+        def submit(*args, **kwargs):
+            submitted.append(args)
+            return submit_render(*args, **kwargs)
+
+        with mock.patch("recipes.chart_pool.get_pool", return_value=pool), mock.patch(
+            "recipes.chart_pool.submit_render", side_effect=submit
+        ):
+            # the search page starts the render, then the page asks for the chart
+            warming = warm_charts(["#1"], data, "svg")
+            chart = asyncio.ensure_future(aget_chart("#1", data, "svg"))
+            while len(submitted) < 2:
+                await asyncio.sleep(0.01)
+            render.set_result(b"<svg/>")
+
+            self.assertEqual(await chart, b"<svg/>")
+        wait(warming, timeout=5)
+        pool.submit.assert_called_once()
+
+    def test_async_chart_renders_in_process_when_pool_is_broken(self):
+        url = reverse("recipes:chart_async", kwargs={"kind": "bar", "fmt": "png"})
+        # a worker was killed, e.g. by the out-of-memory killer
+        broken = Future()
+        broken.set_exception(BrokenProcessPool("A worker died"))
+        pool = mock.Mock(**{"submit.return_value": broken})
+        with mock.patch("recipes.chart_pool.get_pool", return_value=pool), mock.patch(
+            "recipes.chart_pool.shutdown_pool"
+        ) as shutdown:
+            response = self.client.get(url, {"search_by": "name", "search_term": "e"})
+
+        # the chart still arrives, and the next render gets a fresh pool
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+        shutdown.assert_called_once()
+
+    def test_async_chart_requires_login(self):
+        url = reverse("recipes:chart_async", kwargs={"kind": "bar", "fmt": "png"})
+        response = Client().get(url, {"search_by": "name", "search_term": "e"})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response["Location"].startswith(reverse("login")))
+
+
+class SearchResultsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # create test user and recipes
+        cls.user = User.objects.create_user(username="testuser", password="12345")
+        cls.recipe = Recipe.objects.create(
+            name="<b>Bold</b> Tea", ingredients="Tea leaves, Water", cooking_time=5
+        )
+        Recipe.objects.create(
+            name="Stew", ingredients="Beef, Carrot, Potato, Onion", cooking_time=60
+        )
+
+    def setUp(self):
+        # initialize test client and log test user in
+        self.client = Client()
+        self.client.login(username="testuser", password="12345")
+
+    def test_results_are_escaped_and_linked(self):
+        response = self.client.post(
+            reverse("recipes:search"), data={"search_by": "name", "search_term": "Tea"}
+        )
+
+        # recipe names are escaped, and linked to their detail page
+        self.assertContains(response, "&lt;b&gt;Bold&lt;/b&gt; Tea")
+        self.assertNotContains(response, "<b>Bold</b>")
+        self.assertContains(response, f'href="{self.recipe.get_absolute_url()}"')
+
+    def test_analytics_export(self):
+        response = self.client.get(
+            reverse("recipes:analytics_export"),
+            {"search_by": "name", "search_term": ""},
+        )
+
+        # one summary row per difficulty
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = response.content.decode().splitlines()
+        self.assertTrue(lines[0].startswith("difficulty,recipes,mean_cooking_time"))
+        self.assertEqual(lines[1:], ["Easy,1,5.0,5,5,2.0", "Hard,1,60.0,60,60,4.0"])
+
+    def test_client_chart_mode_ships_json_payload(self):
+        with mock.patch("recipes.views.warm_charts") as warm:
+            response = self.client.post(
+                reverse("recipes:search"),
+                data={"search_by": "name", "search_term": "", "chart_mode": "client"},
+            )
+        warm.assert_not_called()
+
+        # one JSON payload and the drawing script instead of chart images
+        self.assertNotContains(response, "/async/charts/")
+        self.assertContains(response, "minicharts.js")
+        self.assertEqual(
+            response.context["chart_data"],
+            {
+                "names": ["<b>Bold</b> Tea", "Stew"],
+                "cooking_times": [5, 60],
+                "ingredient_counts": [2, 4],
+                "difficulty_counts": [("Easy", 1), ("Hard", 1)],
+            },
+        )
+        # names are escaped inside the script tag
+        self.assertContains(response, "\\u003Cb\\u003EBold")
+
+    def test_chart_mode_defaults_by_result_size(self):
+        search = {"search_by": "name", "search_term": ""}
+        response = self.client.post(reverse("recipes:search"), data=search)
+        self.assertEqual(response.context["chart_mode"], "image")
+
+        Recipe.objects.bulk_create(
+            [
+                Recipe(name=f"Toast {number}", ingredients="Bread", cooking_time=2)
+                for number in range(CLIENT_CHART_THRESHOLD)
+            ]
+        )
+        response = self.client.post(reverse("recipes:search"), data=search)
+        self.assertEqual(response.context["chart_mode"], "client")
+
+        # still available as images when asked for
+        with mock.patch("recipes.views.warm_charts"):
+            response = self.client.post(
+                reverse("recipes:search"), data=dict(search, chart_mode="image")
+            )
+        self.assertEqual(response.context["chart_mode"], "image")
+        self.assertContains(response, "/async/charts/bar.png?search_by=name")
+
+    def test_csv_export_streams_results(self):
+        response = self.client.get(
+            reverse("recipes:export", kwargs={"fmt": "csv"}),
+            {"search_by": "difficulty", "difficulty": "Hard"},
+        )
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            lines[0],
+            "id,name,ingredients,cooking_time,difficulty,number_of_ingredients",
+        )
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"Beef, Carrot, Potato, Onion",60,Hard,4', lines[1])
+
+    def test_ndjson_export_streams_results(self):
+        response = self.client.get(
+            reverse("recipes:export", kwargs={"fmt": "ndjson"}),
+            {"search_by": "name", "search_term": ""},
+        )
+
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [record["name"] for record in records], ["<b>Bold</b> Tea", "Stew"]
+        )
+        self.assertEqual(records[0]["cooking_time"], 5)
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        # AsyncClient makes ASGI requests, like uvicorn
+        self.async_client.cookies = self.client.cookies
+        response = await self.async_client.get(
+            reverse("recipes:export", kwargs={"fmt": "csv"}),
+            {"search_by": "difficulty", "difficulty": "Hard"},
+        )
+
+        # an async iterator, so the server sends rows without reading them all first
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        lines = content.decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"Beef, Carrot, Potato, Onion",60,Hard,4', lines[1])
+
+    def test_export_rejects_unknown_format(self):
+        response = self.client.get(
+            reverse("recipes:export", kwargs={"fmt": "xml"}),
+            {"search_by": "name", "search_term": ""},
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class RecipeListPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # create test user and five recipes, two sharing a name
+        cls.user = User.objects.create_user(username="testuser", password="12345")
+        for name in ["Apple Pie", "Bread", "Bread", "Coffee", "Donut"]:
+            Recipe.objects.create(name=name, ingredients="Flour, Water", cooking_time=5)
+
+    def setUp(self):
+        # initialize test client, log test user in and use pages of two
+        self.client = Client()
+        self.client.login(username="testuser", password="12345")
+        patcher = mock.patch.object(RecipeListView, "page_size", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_page(self, **params):
+        response = self.client.get(reverse("recipes:list"), params)
+        page = response.context["page"]
+        return [recipe.name for recipe in page.object_list], page
+
+    def test_walks_forward_and_back(self):
+        names, page = self.get_page()
+        self.assertEqual(names, ["Apple Pie", "Bread"])
+        self.assertFalse(page.has_previous)
+
+        # ties on name are broken by id, so no row is skipped or repeated
+        names, page = self.get_page(after=page.next_cursor)
+        self.assertEqual(names, ["Bread", "Coffee"])
+
+        names, last = self.get_page(after=page.next_cursor)
+        self.assertEqual(names, ["Donut"])
+        self.assertFalse(last.has_next)
+
+        # going back returns the same page as before
+        names, page = self.get_page(before=last.previous_cursor)
+        self.assertEqual(names, ["Bread", "Coffee"])
+        self.assertTrue(page.has_next)
+
+    def test_page_query_uses_only_list_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("recipes:list"))
+
+        # the page query is limited and skips the columns the list doesn't show
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertIn("LIMIT 3", sql)
+        self.assertNotIn("ingredients", sql)
+
+    @skipUnless(connection.vendor == "sqlite", "reads SQLite's query plan")
+    def test_cursor_seeks_into_the_index(self):
+        # the queries keyset_paginate runs for the pages after and before a cursor
+        for reverse, ordering in [(False, ("name", "id")), (True, ("-name", "-id"))]:
+            with self.subTest(reverse=reverse):
+                queryset = Recipe.objects.filter(
+                    keyset_filter(("name", "id"), ["Coffee", 2], reverse=reverse)
+                ).order_by(*ordering)[:3]
+
+                # one seek to the cursor on recipe_name_id_idx, which also gives the
+                # order; not a SCAN from the start of the index, nor a MULTI-INDEX OR
+                # whose rows are sorted again afterwards
+                plan = queryset.explain()
+                self.assertIn(
+                    "SEARCH recipes_recipe USING INDEX recipe_name_id_idx "
+                    f"(name{'<' if reverse else '>'}?)",
+                    plan,
+                )
+                self.assertNotIn("SCAN", plan)
+                self.assertNotIn("MULTI-INDEX OR", plan)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("recipes:list"), {"after": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_values_must_be_scalars(self):
+        # well-formed JSON of the right length, but not values a cursor holds
+        for values in (["Tea", [1]], ["Tea", {"a": 1}], ["Tea", None], [True, 1]):
+            with self.subTest(values=values):
+                response = self.client.get(
+                    reverse("recipes:list"), {"after": encode_cursor(values)}
+                )
+                self.assertEqual(response.status_code, 404)
+
+
+class PictureRenditionTest(TestCase):
+    def setUp(self):
+        # keep uploaded and generated files out of the project's media folder
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_image(self, name="dish.jpg", size=(1200, 900), color="orange"):
+        buffer = BytesIO()
+        Image.new("RGB", size, color).save(buffer, "JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+    def create_with_picture(self, name="Soup"):
+        # saves the recipe, then lets the background worker create its renditions
+        recipe = Recipe.objects.create(
+            name=name, ingredients="Water", cooking_time=5, pic=self.make_image()
+        )
+        call_command("process_jobs", once=True, same_host=True, stdout=StringIO())
+        recipe.refresh_from_db()
+        return recipe
+
+    def test_renditions_created_by_worker(self):
+        recipe = Recipe.objects.create(
+            name="Soup", ingredients="Water", cooking_time=5, pic=self.make_image()
+        )
+
+        # saving only queues the work
+        self.assertEqual(recipe.renditions_status, RENDITIONS_PENDING)
+        self.assertEqual(recipe.pic_thumbnail.name, "")
+
+        call_command("process_jobs", once=True, same_host=True, stdout=StringIO())
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.renditions_status, RENDITIONS_READY)
+
+        # each rendition is resized and stored in its format
+        expected = {
+            "pic_thumbnail": (200, "JPEG"),
+            "pic_medium": (800, "JPEG"),
+            "pic_webp": (800, "WEBP"),
+        }
+        for field, (longest_side, image_format) in expected.items():
+            with Image.open(getattr(recipe, field).path) as image:
+                self.assertEqual(max(image.size), longest_side)
+                self.assertEqual(image.format, image_format)
+
+        # stored names are kept on the row
+        self.assertTrue(recipe.pic_thumbnail.name.startswith("recipes/renditions/"))
+
+    def test_identical_pictures_share_renditions(self):
+        first = self.create_with_picture("Soup")
+        second = self.create_with_picture("Soup 2")
+
+        # content-hashed names point both recipes at the same files
+        self.assertNotEqual(first.pic.name, second.pic.name)
+        self.assertEqual(first.pic_medium.name, second.pic_medium.name)
+
+    def test_default_picture_has_no_renditions(self):
+        recipe = Recipe.objects.create(name="Tea", ingredients="Water", cooking_time=5)
+        self.assertEqual(recipe.pic_thumbnail.name, "")
+        self.assertEqual(recipe.renditions_status, RENDITIONS_NONE)
+        self.assertFalse(Job.objects.exists())
+
+    def test_pages_use_srcset(self):
+        recipe = self.create_with_picture()
+        User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+
+        for url in [reverse("recipes:list"), recipe.get_absolute_url()]:
+            response = self.client.get(url)
+            self.assertContains(response, f"{recipe.pic_thumbnail.url} 200w")
+            self.assertContains(response, 'type="image/webp"')
+
+    def test_backfill_command(self):
+        # pictures already in storage, e.g. loaded before renditions existed
+        recipes = []
+        for number in range(3):
+            recipe = Recipe.objects.create(
+                name=f"Dish {number}", ingredients="Water", cooking_time=5
+            )
+            pic = default_storage.save(
+                f"recipes/dish_{number}.jpg", self.make_image(color=f"#00{number}0ff")
+            )
+            recipes.append(recipe)
+            Recipe.objects.filter(pk=recipe.pk).update(pic=pic)
+
+        call_command("generate_renditions", workers=2, stdout=StringIO())
+
+        # every recipe now has renditions on disk
+        for recipe in recipes:
+            recipe.refresh_from_db()
+            self.assertTrue(recipe.pic_webp.name)
+            self.assertTrue(default_storage.exists(recipe.pic_webp.name))
+            self.assertEqual(recipe.renditions_status, RENDITIONS_READY)
+
+    def test_add_recipe_returns_before_processing(self):
+        User.objects.create_user(username="testuser", password="12345")
+        self.client.login(username="testuser", password="12345")
+
+        with mock.patch("recipes.jobs.generate_renditions") as generate:
+            response = self.client.post(
+                reverse("recipes:add_recipe"),
+                {
+                    "name": "Soup",
+                    "ingredients": "Water",
+                    "cooking_time": 5,
+                    "pic": self.make_image(),
+                },
+            )
+
+        # the request only queued the work
+        self.assertRedirects(response, reverse("recipes:list"))
+        generate.assert_not_called()
+        recipe = Recipe.objects.get(name="Soup")
+        self.assertEqual(recipe.renditions_status, RENDITIONS_PENDING)
+        self.assertEqual(
+            list(Job.objects.values_list("task", "payload")),
+            [("renditions", {"recipe_id": recipe.pk})],
+        )
+
+    def test_recipe_is_not_saved_without_its_job(self):
+        recipe = Recipe(
+            name="Soup", ingredients="Water, Salt", cooking_time=5, pic="recipes/a.jpg"
+        )
+
+        # the job can't be queued, so neither the recipe nor its ingredients stay
+        with mock.patch("recipes.jobs.enqueue", side_effect=RuntimeError("queue down")):
+            with self.assertRaises(RuntimeError):
+                recipe.save()
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(RecipeIngredient.objects.exists())
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        self.calls = []
+        patcher = mock.patch.dict(
+            TASKS,
+            {
+                "record": (self.record, None),
+                "explode": (self.explode, self.record_failure),
+            },
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, **payload):
+        self.calls.append(payload)
+
+    def explode(self, **payload):
+        raise RuntimeError("boom")
+
+    def record_failure(self, **payload):
+        self.calls.append(("failed", payload))
+
+    def test_runs_jobs_in_order(self):
+        enqueue("record", value=1)
+        enqueue("record", value=2)
+
+        self.assertEqual(run_next_job().status, Job.DONE)
+        self.assertEqual(run_next_job().status, Job.DONE)
+        self.assertIsNone(run_next_job())
+        self.assertEqual(self.calls, [{"value": 1}, {"value": 2}])
+
+    def test_job_is_claimed_once(self):
+        job = enqueue("record")
+
+        # a second worker racing for the same job gets nothing
+        self.assertEqual(claim_next_job().pk, job.pk)
+        self.assertIsNone(claim_next_job())
+
+    def test_retries_with_backoff_then_fails(self):
+        job = enqueue("explode", max_attempts=2, value=1)
+
+        # first failure schedules a retry in the future
+        run_next_job()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn("boom", job.last_error)
+        self.assertIsNone(run_next_job())
+
+        # once due again, the last attempt fails for good and runs the failure hook
+        Job.objects.update(run_after=timezone.now())
+        run_next_job()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(self.calls, [("failed", {"value": 1})])
+
+    def test_stale_running_jobs_are_requeued(self):
+        enqueue("record")
+        claim_next_job()
+        Job.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=10)), 1)
+        self.assertEqual(run_next_job().status, Job.DONE)
+
+    def test_stale_job_on_its_last_attempt_fails(self):
+        job = enqueue("explode", max_attempts=1, value=1)
+        claim_next_job()
+        Job.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+        # the worker died during the only attempt, so the job isn't run again
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=10)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(self.calls, [("failed", {"value": 1})])
+        self.assertIsNone(run_next_job())
+
+    def test_worker_refuses_local_uploads_on_another_host(self):
+        # a separate worker dyno can't read pictures in the web dyno's MEDIA_ROOT
+        with self.assertRaisesMessage(CommandError, "--same-host"):
+            call_command("process_jobs", once=True, stdout=StringIO())
+
+    def test_stale_after_must_cover_several_heartbeats(self):
+        with self.assertRaisesMessage(CommandError, "--stale-after"):
+            call_command("process_jobs", once=True, same_host=True, stale_after=60)
+
+
+# the heartbeat writes from its own thread and connection, so the job has to be
+# committed for it to see
+class JobHeartbeatTest(TransactionTestCase):
+    def test_long_running_job_is_not_stale(self):
+        requeued = []
+
+        # runs for longer than the stale timeout below, like a big picture would
+        def slow(**payload):
+            time.sleep(1)
+            requeued.append(requeue_stale_jobs(timedelta(seconds=0.5)))
+
+        with mock.patch.dict(TASKS, {"slow": (slow, None)}), mock.patch(
+            "recipes.jobs.HEARTBEAT_INTERVAL", timedelta(milliseconds=100)
+        ):
+            enqueue("slow")
+            job = run_next_job()
+
+        # the heartbeat kept the job fresh, so it ran once, to completion
+        self.assertEqual(requeued, [0])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+
+class RecipeStatisticsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # create test user
+        cls.user = User.objects.create_user(username="testuser", password="12345")
+
+    def statistics(self):
+        return {
+            (dimension, bucket): count
+            for dimension, bucket, count in RecipeStatistic.objects.filter(
+                count__gt=0
+            ).values_list("dimension", "bucket", "count")
+        }
+
+    def test_incremental_updates_match_rebuild(self):
+        soup = Recipe.objects.create(
+            name="Soup", ingredients="Water, Salt", cooking_time=5
+        )
+        stew = Recipe.objects.create(
+            name="Stew", ingredients="Beef, Carrot, Potato, Onion", cooking_time=60
+        )
+        Recipe.objects.create(name="Salad", ingredients="Lettuce", cooking_time=2)
+        self.assertEqual(self.statistics()[("difficulty", "Easy")], 2)
+
+        # moving between buckets, including through a partially loaded instance
+        soup.cooking_time = 25
+        soup.save()
+        partial = Recipe.objects.only("id", "ingredients").get(pk=stew.pk)
+        partial.ingredients = "Beef"
+        partial.save(update_fields=["ingredients"])
+        Recipe.objects.get(name="Salad").delete()
+
+        incremental = self.statistics()
+        rebuild_statistics()
+        self.assertEqual(incremental, self.statistics())
+        self.assertEqual(
+            incremental,
+            {
+                ("difficulty", "Intermediate"): 2,
+                ("cooking_time", "20-29 min"): 1,
+                ("cooking_time", "60+ min"): 1,
+                ("ingredients", "1-3"): 2,
+            },
+        )
+
+    def test_rebuild_command(self):
+        Recipe.objects.create(name="Soup", ingredients="Water", cooking_time=5)
+        RecipeStatistic.objects.all().delete()
+
+        call_command("rebuild_recipe_stats", stdout=StringIO())
+        self.assertEqual(self.statistics()[("cooking_time", "Under 10 min")], 1)
+
+    def test_dashboard_reads_only_statistics(self):
+        for number in range(10):
+            Recipe.objects.create(
+                name=f"Soup {number}", ingredients="Water", cooking_time=number
+            )
+        self.client.login(username="testuser", password="12345")
+
+        # session, user and the statistics table, however many recipes exist
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("recipes:dashboard"))
+        self.assertContains(response, "10 recipes", count=3)
+
+    def test_dashboard_requires_login(self):
+        response = self.client.get(reverse("recipes:dashboard"))
+        self.assertEqual(response.status_code, 302)
+
+
+class ImportRecipesTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def import_file(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_recipes", path, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_imports_csv_in_batches(self):
+        path = self.write_file(
+            "recipes.csv",
+            "name,ingredients,cooking_time\n"
+            'Soup,"Water, Salt",5\n'
+            'Stew,"Beef, Carrot, Potato, Onion",60\n'
+            'Salad,"Lettuce, salt",2\n',
+        )
+
+        output, errors = self.import_file(path, batch_size=2)
+        self.assertIn("Imported 3 recipes", output)
+        self.assertIn("rows/s", output)
+        self.assertEqual(errors, "")
+
+        # derived fields, ingredient rows and statistics match saving one by one
+        stew = Recipe.objects.get(name="Stew")
+        self.assertEqual(stew.difficulty, "Hard")
+        self.assertEqual(stew.number_of_ingredients, 4)
+        self.assertEqual(
+            list(Recipe.objects.with_ingredient("salt").order_by("name")),
+            list(Recipe.objects.filter(name__in=["Salad", "Soup"]).order_by("name")),
+        )
+        self.assertEqual(Ingredient.objects.filter(name="salt").count(), 1)
+        self.assertEqual(
+            RecipeStatistic.objects.get(dimension="difficulty", bucket="Easy").count, 2
+        )
+
+    def test_invalid_ndjson_records_are_skipped(self):
+        path = self.write_file(
+            "recipes.jsonl",
+            '{"name": "Tea", "ingredients": "Tea leaves, Water", "cooking_time": 5}\n'
+            "\n"
+            '{"name": "Toast", "ingredients": "Bread", "cooking_time": "soon"}\n'
+            "not json\n",
+        )
+
+        output, errors = self.import_file(path)
+        self.assertIn("Imported 1 recipes", output)
+        self.assertIn("2 skipped", output)
+        self.assertIn("Record 2 skipped", errors)
+        self.assertIn("Record 3 skipped", errors)
+        self.assertEqual(list(Recipe.objects.values_list("name", flat=True)), ["Tea"])
+
+
+class CatalogBenchmarkTest(TestCase):
+    def test_generated_catalog_is_complete_and_repeatable(self):
+        call_command("generate_catalog", "40", batch_size=15, stdout=StringIO())
+        first = list(Recipe.objects.values_list("name", "ingredients", "cooking_time"))
+        self.assertEqual(len(first), 40)
+
+        # derived fields, join rows and statistics are filled in as on save()
+        for recipe in Recipe.objects.all():
+            self.assertGreater(recipe.cooking_time, 0)
+            self.assertLessEqual(len(recipe.name), 50)
+            self.assertEqual(
+                recipe.ingredient_items.count(), recipe.number_of_ingredients
+            )
+        self.assertEqual(
+            sum(
+                RecipeStatistic.objects.filter(dimension="difficulty").values_list(
+                    "count", flat=True
+                )
+            ),
+            40,
+        )
+
+        # a non-empty database is refused unless appending
+        with self.assertRaises(CommandError):
+            call_command("generate_catalog", "1k", stdout=StringIO())
+
+        Recipe.objects.all().delete()
+        call_command("generate_catalog", "40", stdout=StringIO())
+        self.assertEqual(
+            list(Recipe.objects.values_list("name", "ingredients", "cooking_time")),
+            first,
+        )
+
+    @override_settings(CHART_POOL_WORKERS=0)
+    def test_benchmark_writes_json_per_view_and_size(self):
+        call_command("generate_catalog", "30", stdout=StringIO())
+        path = os.path.join(tempfile.mkdtemp(), "benchmark.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+
+        call_command(
+            "benchmark_views",
+            repeat=2,
+            sizes=[5, 1000],
+            chart_sizes=[3],
+            output=path,
+            stderr=StringIO(),
+        )
+        with open(path, encoding="utf-8") as file:
+            report = json.load(file)
+
+        self.assertEqual(report["recipes"], 30)
+        self.assertEqual(report["database"], connection.vendor)
+        results = {
+            (result["view"], result["rows"]): result for result in report["results"]
+        }
+        # sizes above the catalog are capped at the catalog size
+        self.assertIn(("search", 30), results)
+        self.assertEqual(
+            {view for view, _ in results},
+            {"list", "detail", "search", "chart:bar", "chart:pie", "chart:line"},
+        )
+        for result in results.values():
+            self.assertEqual(
+                set(result["latency_ms"]), {"p50", "p90", "p95", "p99", "mean", "max"}
+            )
+            self.assertGreaterEqual(result["peak_memory_kib"], 0)
+        self.assertGreater(results[("list", 20)]["queries"], 0)
+        # the benchmark user is removed again
+        self.assertFalse(
+            User.objects.filter(username__startswith="benchmark-").exists()
+        )
+
+
+class SearchQueryCountTest(TestCase):
+    # session, user and the single results query
+    SEARCH_QUERIES = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        # create test user
+        cls.user = User.objects.create_user(username="testuser", password="12345")
+
+    def setUp(self):
+        # initialize test client and log test user in
+        self.client = Client()
+        self.client.login(username="testuser", password="12345")
+
+    def search_all_hard_recipes(self):
+        return self.client.post(
+            reverse("recipes:search"),
+            data={"search_by": "difficulty", "difficulty": "Hard"},
+        )
+
+    def test_search_query_count_is_constant(self):
+        # one matching recipe
+        Recipe.objects.create(
+            name="Stew 0", ingredients="Beef, Carrot, Potato, Onion", cooking_time=60
+        )
+        with self.assertNumQueries(self.SEARCH_QUERIES):
+            response = self.search_all_hard_recipes()
+        self.assertContains(response, "Stew ", count=1)
+
+        # many matching recipes should not add any queries
+        for number in range(1, 40):
+            Recipe.objects.create(
+                name=f"Stew {number}",
+                ingredients="Beef, Carrot, Potato, Onion",
+                cooking_time=60,
+            )
+        with self.assertNumQueries(self.SEARCH_QUERIES):
+            response = self.search_all_hard_recipes()
+        self.assertContains(response, "Stew ", count=40)
+
+
+# the settings a shared session cache turns on; a LocMemCache is shared by
+# everything in the test process, like Redis would be by every web process
+@override_settings(
+    CACHES={
+        **settings.CACHES,
+        "sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    },
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+    AUTHENTICATION_BACKENDS=[
+        "recipes.backends.CachedModelBackend",
+        "django.contrib.auth.backends.ModelBackend",
+    ],
+)
+class SessionCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="12345")
+        Recipe.objects.create(name="Tea", ingredients="Tea leaves", cooking_time=5)
+
+    # queries of a warm, logged-in list page request
+    def list_page_queries(self):
+        client = Client()
+        client.login(username="testuser", password="12345")
+        client.get(reverse("recipes:list"))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse("recipes:list"))
+        self.assertContains(response, "Tea")
+        return len(queries)
+
+    def test_cached_session_and_user_save_two_queries_per_request(self):
+        with override_settings(
+            SESSION_ENGINE="django.contrib.sessions.backends.db",
+            AUTHENTICATION_BACKENDS=["django.contrib.auth.backends.ModelBackend"],
+        ):
+            database_queries = self.list_page_queries()
+        cached_queries = self.list_page_queries()
+        self.assertEqual(database_queries - cached_queries, 2)
+
+    def test_logout_ends_the_cached_session(self):
+        client = Client()
+        client.login(username="testuser", password="12345")
+        client.get(reverse("recipes:list"))
+        session_cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+        client.get(reverse("logout"))
+        self.assertIsNone(get_user_cache().get(user_cache_key(self.user.pk)))
+
+        # the old session cookie no longer logs anyone in
+        replay = Client()
+        replay.cookies[settings.SESSION_COOKIE_NAME] = session_cookie
+        response = replay.get(reverse("recipes:list"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_user_changes_reach_the_next_request(self):
+        self.client.login(username="testuser", password="12345")
+        self.assertEqual(self.client.get(reverse("recipes:list")).status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse("recipes:list")).status_code, 302)
+
+    def test_sessions_from_model_backend_stay_logged_in(self):
+        # logged in before CachedModelBackend, with the old backend in the session
+        client = Client()
+        client.force_login(
+            self.user, backend="django.contrib.auth.backends.ModelBackend"
+        )
+        self.assertEqual(client.get(reverse("recipes:list")).status_code, 200)
+
+    def test_per_process_cache_fails_the_check(self):
+        [error] = check_session_cache(None)
+        self.assertEqual(error.id, "recipes.E001")
+
+        # fine on a development server, and with the default, uncached setup
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_session_cache(None), [])
+        with override_settings(
+            SESSION_ENGINE="django.contrib.sessions.backends.db",
+            AUTHENTICATION_BACKENDS=["django.contrib.auth.backends.ModelBackend"],
+        ):
+            self.assertEqual(check_session_cache(None), [])
+
 
 class RecipeFormTest(TestCase):
     # test form validation with valid data
@@ -252,6 +1736,384 @@ class RecipeFormTest(TestCase):
         self.assertEqual(len(form.errors), 3)
 
 
+class RecipeApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # create test user and recipes
+        cls.user = User.objects.create_user(username="testuser", password="12345")
+        for number in range(5):
+            Recipe.objects.create(
+                name=f"Soup {number}", ingredients="Water, Salt", cooking_time=5
+            )
+        cls.stew = Recipe.objects.create(
+            name="Stew", ingredients="Beef, Carrot, Potato, Onion", cooking_time=60
+        )
+
+    def setUp(self):
+        # initialize test client and log test user in
+        self.client = Client()
+        self.client.login(username="testuser", password="12345")
+
+    def test_requires_login(self):
+        response = Client().get(reverse("recipes:api_list"))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"error": "Authentication required"})
+
+    def test_list_pages_by_cursor_with_selected_fields(self):
+        response = self.client.get(
+            reverse("recipes:api_list"), {"fields": "id,name", "page_size": 4}
+        )
+        data = response.json()
+        self.assertEqual(
+            [recipe["name"] for recipe in data["results"]],
+            ["Soup 0", "Soup 1", "Soup 2", "Soup 3"],
+        )
+        self.assertEqual(set(data["results"][0]), {"id", "name"})
+        self.assertIsNone(data["previous"])
+
+        data = self.client.get(data["next"]).json()
+        self.assertEqual(
+            [recipe["name"] for recipe in data["results"]], ["Soup 4", "Stew"]
+        )
+        self.assertIsNone(data["next"])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse("recipes:api_list"), {"fields": "secret"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get(
+            reverse("recipes:api_list"), {"after": encode_cursor(["Tea", [1]])}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Invalid page cursor"})
+
+    def test_detail_revalidates_with_etag_and_last_modified(self):
+        url = reverse("recipes:api_detail", kwargs={"pk": self.stew.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.json()["difficulty"], "Hard")
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        # unchanged recipe: 304 from one timestamp query, nothing serialized
+        with self.assertNumQueries(3):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        cached = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(cached.status_code, 304)
+
+        # an edit changes the ETag
+        Recipe.objects.filter(pk=self.stew.pk).update(
+            updated_at=timezone.now() + timedelta(seconds=5)
+        )
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_missing_recipe_is_json_404(self):
+        response = self.client.get(reverse("recipes:api_detail", kwargs={"pk": 999}))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"error": "Recipe not found"})
+
+    def test_list_etag_changes_on_delete(self):
+        url = reverse("recipes:api_list")
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # no Last-Modified: the newest timestamp doesn't move when a row is deleted
+        self.assertNotIn("Last-Modified", response)
+        since = http_date(time.time())
+        Recipe.objects.get(name="Soup 0").delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, 200
+        )
+
+    def test_list_etag_comes_from_the_page_rows(self):
+        url = reverse("recipes:api_list")
+        params = {"page_size": 2}
+        etag = self.client.get(url, params)["ETag"]
+
+        # revalidating runs the page's own query, no aggregate over the catalog
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        recipe_queries = [
+            query["sql"] for query in queries if "recipes_recipe" in query["sql"]
+        ]
+        self.assertEqual(len(recipe_queries), 1)
+        self.assertNotIn("COUNT(", recipe_queries[0])
+        self.assertNotIn("MAX(", recipe_queries[0])
+
+        # an edit on a later page leaves this one valid, an edit on it doesn't
+        self.stew.save()
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Recipe.objects.get(name="Soup 1").save()
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_search(self):
+        response = self.client.get(
+            reverse("recipes:api_search"),
+            {"search_by": "difficulty", "difficulty": "Hard", "fields": "name"},
+        )
+        self.assertEqual(response.json()["results"], [{"name": "Stew"}])
+
+        response = self.client.get(
+            reverse("recipes:api_search"), {"search_by": "nonsense"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(REQUEST_TIMING=True, CHART_POOL_WORKERS=0)
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="12345")
+        Recipe.objects.create(
+            name="Tea", ingredients="Tea leaves, Sugar, Water", cooking_time=5
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.login(username="testuser", password="12345")
+        get_chart_cache().clear()
+
+    # metric name: (duration in ms, description) from a Server-Timing header
+    def metrics(self, response):
+        entries = {}
+        for entry in response["Server-Timing"].split(", "):
+            name, duration, description = entry.split(";")
+            entries[name] = (float(duration[4:]), description)
+        return entries
+
+    def test_search_reports_database_and_template_time(self):
+        with self.assertLogs("recipes.timing", "INFO") as logs:
+            response = self.client.post(
+                reverse("recipes:search"),
+                data={"search_by": "name", "search_term": "Tea"},
+            )
+
+        # the charts render in the pool and are timed by the chart views
+        metrics = self.metrics(response)
+        self.assertEqual(list(metrics), ["total", "db", "template"])
+        self.assertGreaterEqual(metrics["total"][0], metrics["template"][0])
+
+        # one structured line per request, with the same figures
+        self.assertEqual(len(logs.records), 1)
+        record = logs.records[0]
+        self.assertIn("method=POST path=/search status=200", record.getMessage())
+        self.assertEqual(record.timing["chart_count"], 0)
+        self.assertGreater(record.timing["db_count"], 0)
+
+    def test_chart_is_timed(self):
+        url = reverse("recipes:chart", kwargs={"kind": "bar", "fmt": "png"})
+        response = self.client.get(url, {"search_by": "name", "search_term": "Tea"})
+        metrics = self.metrics(response)
+        self.assertEqual(list(metrics), ["total", "db", "chart"])
+        self.assertIn("Chart rendering (1x)", metrics["chart"][1])
+
+    def test_class_based_views_time_templates(self):
+        response = self.client.get(reverse("recipes:list"))
+        self.assertIn("template", self.metrics(response))
+
+    def test_async_chart_is_timed(self):
+        url = reverse("recipes:chart_async", kwargs={"kind": "pie", "fmt": "svg"})
+        response = self.client.get(url, {"search_by": "name", "search_term": "Tea"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("chart", self.metrics(response))
+
+    @override_settings(REQUEST_TIMING=False)
+    def test_disabled_timing_leaves_responses_alone(self):
+        with self.assertNoLogs("recipes.timing"):
+            response = self.client.get(reverse("recipes:list"))
+        self.assertNotIn("Server-Timing", response)
+
+
+class AsgiMiddlewareTest(SimpleTestCase):
+    def test_every_middleware_runs_on_the_event_loop(self):
+        # one sync-only middleware puts the rest of the chain in a thread under ASGI
+        for path in settings.MIDDLEWARE:
+            with self.subTest(middleware=path):
+                self.assertTrue(import_string(path).async_capable)
+
+    @override_settings(WHITENOISE_USE_FINDERS=True)
+    async def test_static_files_are_served_under_asgi(self):
+        response = await self.async_client.get("/static/recipes/css/list.css")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], 'text/css; charset="utf-8"')
+
+
+@override_settings(CHART_POOL_WORKERS=0)
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="12345")
+        Recipe.objects.create(
+            name="Tea", ingredients="Tea leaves, Sugar, Water", cooking_time=5
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.client = Client()
+        self.client.login(username="testuser", password="12345")
+        get_chart_cache().clear()
+
+    def profiles(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_sampled_requests_are_profiled_and_rotated(self):
+        with override_settings(
+            PROFILING_SAMPLE_RATE=1, PROFILING_DIR=self.directory, PROFILING_MAX_FILES=2
+        ):
+            for _ in range(3):
+                self.client.get(reverse("recipes:list"))
+
+        # only the newest profiles are kept
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertTrue(all("-sampled-GET-list-" in name for name in profiles))
+
+        output = StringIO()
+        call_command("summarize_profiles", dir=self.directory, stdout=output)
+        self.assertIn("2 profiles", output.getvalue())
+        self.assertIn("django.db", output.getvalue())
+
+    async def test_async_requests_profile_their_sync_thread(self):
+        self.async_client.cookies = self.client.cookies
+        with override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_DIR=self.directory):
+            response = await self.async_client.get(reverse("recipes:list"))
+        self.assertEqual(response.status_code, 200)
+
+        # the sync view and its queries ran in the profiled thread
+        [profile] = self.profiles()
+        self.assertIn("-sampled-GET-list-", profile)
+        stats = pstats.Stats(os.path.join(self.directory, profile))
+        self.assertTrue(
+            any(name == "get_queryset" for _, _, name in stats.stats),
+        )
+
+    async def test_chart_pool_wait_is_in_the_profile(self):
+        self.addCleanup(shutdown_pool)
+        self.async_client.cookies = self.client.cookies
+        with override_settings(
+            CHART_POOL_WORKERS=1, PROFILING_SAMPLE_RATE=1, PROFILING_DIR=self.directory
+        ):
+            response = await self.async_client.get(
+                reverse("recipes:chart_async", kwargs={"kind": "bar", "fmt": "png"}),
+                {"search_by": "name", "search_term": "Tea"},
+            )
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+
+        # the render ran in a worker process, so the profile holds only its wait
+        [profile] = self.profiles()
+        stats = pstats.Stats(os.path.join(self.directory, profile))
+        calls, _, _, cumulative, _ = stats.stats[POOL_FUNCTION]
+        self.assertEqual(calls, 1)
+        self.assertGreater(cumulative, 0)
+
+        output = StringIO()
+        call_command("summarize_profiles", dir=self.directory, stdout=output)
+        self.assertIn("chart pool", output.getvalue())
+
+    def test_only_slow_requests_keep_stack_samples(self):
+        # loads the list template before anything is timed
+        self.client.get(reverse("recipes:list"))
+        with override_settings(
+            PROFILING_SLOW_MS=50, PROFILING_INTERVAL_MS=1, PROFILING_DIR=self.directory
+        ):
+            # a new client loads the middleware with these settings
+            client = Client()
+            client.force_login(self.user)
+            client.get(reverse("recipes:list"))
+            self.assertEqual(self.profiles(), [])
+
+            with mock.patch("recipes.utils.render_chart", side_effect=slow_chart):
+                client.get(
+                    reverse("recipes:chart", kwargs={"kind": "bar", "fmt": "png"}),
+                    {"search_by": "name", "search_term": "Tea"},
+                )
+
+        [profile] = self.profiles()
+        self.assertIn("-slow-GET-charts-bar-png-", profile)
+        output = StringIO()
+        call_command("summarize_profiles", dir=self.directory, limit=100, stdout=output)
+        self.assertIn("(slow_chart)", output.getvalue())
+
+    def test_summary_without_profiles_fails(self):
+        with self.assertRaises(CommandError):
+            call_command("summarize_profiles", dir=self.directory)
+
+    def test_disabled_by_default(self):
+        with override_settings(PROFILING_DIR=self.directory):
+            self.client.get(reverse("recipes:list"))
+        self.assertEqual(self.profiles(), [])
+
+
+# stands in for a chart render that is slow enough to be profiled
+def slow_chart(*args, **kwargs):
+    time.sleep(0.1)
+    return b""
+
+
+class ViewCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # create test users and recipe
+        cls.user = User.objects.create_user(username="testuser", password="12345")
+        cls.other = User.objects.create_user(username="otheruser", password="12345")
+        cls.recipe = Recipe.objects.create(
+            name="Tea", ingredients="Tea leaves, Water", cooking_time=5
+        )
+
+    def setUp(self):
+        get_view_cache().clear()
+        self.client = Client()
+        self.client.login(username="testuser", password="12345")
+        self.url = reverse("recipes:detail", kwargs={"pk": self.recipe.pk})
+
+    def test_static_pages_render_once(self):
+        # each page's own template, since home.html doesn't extend base.html
+        for name in ["home", "about"]:
+            url = reverse(f"recipes:{name}")
+            with self.assertTemplateUsed(template_name=f"recipes/{name}.html"):
+                self.client.get(url)
+            with self.assertTemplateNotUsed(template_name=f"recipes/{name}.html"):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_detail_hit_skips_query_and_template(self):
+        first = self.client.get(self.url)
+
+        # session and user only, no recipe query or rendering
+        with self.assertNumQueries(2), self.assertTemplateNotUsed(
+            "recipes/detail.html"
+        ):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.content, first.content)
+
+    def test_detail_is_cached_per_user(self):
+        self.client.get(self.url)
+
+        other = Client()
+        other.login(username="otheruser", password="12345")
+        with self.assertTemplateUsed("recipes/detail.html"):
+            other.get(self.url)
+
+    def test_saving_recipe_invalidates_detail(self):
+        self.client.get(self.url)
+
+        self.recipe.name = "Green Tea"
+        self.recipe.save()
+        self.assertContains(self.client.get(self.url), "Green Tea")
+
+    def test_detail_still_requires_login(self):
+        self.client.get(self.url)
+        response = Client().get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+
 class AddRecipeViewTest(TestCase):
     @classmethod
     def setUpTestData(cls):
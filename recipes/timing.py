@@ -0,0 +1,64 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django import shortcuts
+from django.template.response import TemplateResponse
+
+# metrics of the request being served, set by recipes.middleware.ServerTimingMiddleware;
+# None when the middleware is off, so every timer below costs one lookup
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+# seconds and number of calls per metric name for one request; sync_to_async
+# copies the context, so threads serving the request add to the same object
+class RequestMetrics:
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def add(self, name, seconds):
+        self.durations[name] += seconds
+        self.counts[name] += 1
+
+
+# times the block as name when the current request is measured
+@contextmanager
+def timer(name):
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, time.perf_counter() - started)
+
+
+# database execute wrapper, see connection.execute_wrapper; times every query
+# made while a request is measured
+def time_query(execute, sql, params, many, context):
+    with timer("db"):
+        return execute(sql, params, many, context)
+
+
+# adds time_query to a connection once
+def install_query_timer(connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+# django.shortcuts.render with the rendering timed as "template"
+def render(request, template_name, context=None, *args, **kwargs):
+    with timer("template"):
+        return shortcuts.render(request, template_name, context, *args, **kwargs)
+
+
+# response_class for class-based views: times rendering as "template"
+class TimedTemplateResponse(TemplateResponse):
+    @property
+    def rendered_content(self):
+        with timer("template"):
+            return super().rendered_content
@@ -1,5 +1,18 @@
 from django.urls import path
-from .views import home, RecipeListView, RecipeDetailView, search, add_recipe, about
+from . import api
+from .views import (
+    home,
+    RecipeListView,
+    RecipeDetailView,
+    search,
+    chart,
+    chart_async,
+    analytics_export,
+    export,
+    dashboard,
+    add_recipe,
+    about,
+)
 
 app_name = "recipes"
 
@@ -8,6 +21,14 @@ urlpatterns = [
     path("list/", RecipeListView.as_view(), name="list"),
     path("list/<pk>", RecipeDetailView.as_view(), name="detail"),
     path("search", search, name="search"),
+    path("charts/<str:kind>.<str:fmt>", chart, name="chart"),
+    path("async/charts/<str:kind>.<str:fmt>", chart_async, name="chart_async"),
+    path("search/analytics.csv", analytics_export, name="analytics_export"),
+    path("search/export.<str:fmt>", export, name="export"),
+    path("dashboard", dashboard, name="dashboard"),
     path("add_recipe", add_recipe, name="add_recipe"),
     path("about", about, name="about"),
+    path("api/recipes", api.recipe_list, name="api_list"),
+    path("api/recipes/search", api.recipe_search, name="api_search"),
+    path("api/recipes/<int:pk>", api.recipe_detail, name="api_detail"),
 ]
@@ -1,70 +1,180 @@
 from io import BytesIO
-import base64
-import matplotlib.pyplot as plt
+import hashlib
+import json
+from collections import Counter
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from .timing import timer
+
+# cache alias for rendered charts, see CACHES in settings.py
+CHART_CACHE_ALIAS = getattr(settings, "CHART_CACHE_ALIAS", "charts")
+
+# cache alias for rendered pages, see CACHES in settings.py
+VIEW_CACHE_ALIAS = getattr(settings, "VIEW_CACHE_ALIAS", "views")
+VIEW_CACHE_TIMEOUT = getattr(settings, "VIEW_CACHE_TIMEOUT", 60 * 10)
+
+# cache alias for logged-in users, shared with sessions, see recipes/backends.py
+USER_CACHE_ALIAS = getattr(settings, "SESSION_CACHE_ALIAS", "default")
+USER_CACHE_TIMEOUT = getattr(settings, "USER_CACHE_TIMEOUT", 60 * 5)
+
+# serializes renders across threads in a worker
+_render_lock = threading.Lock()
+
+# columns each chart type actually plots, used to fingerprint the data
+CHART_COLUMNS = {
+    "#1": ("name", "cooking_time"),
+    "#2": ("difficulty",),
+    "#3": ("name", "number_of_ingredients"),
+}
 
 
 # defines function to create graph
-def get_graph():
+def get_graph(fig, fmt="png"):
     # creates a BytesIO buffer for the image
     buffer = BytesIO()
 
-    # creates plot with a BytesIO object as a file-like object
-    plt.savefig(buffer, format="png")
-
-    # sets cursor to beginning of the stream
-    buffer.seek(0)
+    # renders the figure through its own canvas with a BytesIO object as a file-like object
+    fig.savefig(buffer, format=fmt)
 
     # retrieves content of the file
-    image_png = buffer.getvalue()
-
-    # encodes the bytes-like object
-    graph = base64.b64encode(image_png)
-
-    # decodes to get the string as output
-    graph = graph.decode("utf-8")
+    graph = buffer.getvalue()
 
     # frees up the memory of buffer
     buffer.close()
 
-    # returns the image/graph
+    # returns the image/graph as raw bytes, served directly by the chart view
     return graph
 
 
+# returns the cache used for rendered charts
+def get_chart_cache():
+    return caches[CHART_CACHE_ALIAS]
+
+
+# returns the cache used for rendered pages
+def get_view_cache():
+    return caches[VIEW_CACHE_ALIAS]
+
+
+# returns the cache used for logged-in users
+def get_user_cache():
+    return caches[USER_CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+# the next request of this user reads it from the database again
+def invalidate_cached_user(user_id):
+    get_user_cache().delete(user_cache_key(user_id))
+
+
+# detail pages are cached per recipe and user under a per-recipe version, so
+# bumping the version drops every user's copy without knowing their keys
+def recipe_detail_cache_key(pk, user_id):
+    cache = get_view_cache()
+    version = cache.get_or_set(f"recipe-detail-version:{pk}", time.time_ns, None)
+    return f"recipe-detail:{pk}:{version}:{user_id}"
+
+
+def invalidate_recipe_detail(pk):
+    get_view_cache().delete(f"recipe-detail-version:{pk}")
+
+
+# hashes the plotted columns so identical result sets share a cache entry
+def chart_fingerprint(chart_type, data):
+    columns = CHART_COLUMNS.get(chart_type, ())
+    plotted = [[str(value) for value in data[column]] for column in columns]
+    payload = json.dumps([chart_type, plotted], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# just the columns a chart type plots, as tuples, which pickle compactly
+def plotted_columns(chart_type, data):
+    return {column: tuple(data[column]) for column in CHART_COLUMNS.get(chart_type, ())}
+
+
+# the chart data as compact JSON-ready columns, for drawing in the browser
+def chart_payload(data):
+    return {
+        "names": list(data["name"]),
+        "cooking_times": list(data["cooking_time"]),
+        "ingredient_counts": list(data["number_of_ingredients"]),
+        # most common first, like the server-drawn pie chart
+        "difficulty_counts": Counter(data["difficulty"]).most_common(),
+    }
+
+
+def chart_cache_key(chart_type, data, fmt):
+    return f"chart:{chart_type}:{fmt}:{chart_fingerprint(chart_type, data)}"
+
+
+# returns the chart from the cache, rendering and storing it on a miss
+def get_chart(chart_type, data, fmt="png", **kwargs):
+    cache = get_chart_cache()
+    key = chart_cache_key(chart_type, data, fmt)
+
+    chart = cache.get(key)
+    if chart is None:
+        with timer("chart"):
+            chart = render_chart(chart_type, data, fmt=fmt, **kwargs)
+        cache.set(key, chart)
+    return chart
+
+
 # defines function to implement logic to prepare the chart based on user input
-def get_chart(chart_type, data, **kwargs):
-    # switches plot backend to Anti-Grain Geometry to write to file
-    plt.switch_backend("AGG")
-
-    # specifies figure size
-    fig = plt.figure(figsize=(6, 3))
-
-    # determines layout of each chart_type
-    if chart_type == "#1":
-        # plots bar chart between recipe name on x-axis and cooking_time on y-axis
-        plt.bar(data["name"], data["cooking_time"])
-        plt.xlabel("Recipe Names")
-        plt.ylabel("Cooking Time (Minutes)")
-        plt.xticks(rotation=45, ha="right")
-
-    elif chart_type == "#2":
-        # generates pie chart based on difficulty with difficulties as labels
-        labels = data["difficulty"].value_counts().index
-        sizes = data["difficulty"].value_counts().values
-        plt.pie(sizes, labels=labels, autopct="%1.1f%%")
-
-    elif chart_type == "#3":
-        # plots line chart between recipe name on x-axis and number of ingredients on y-axis
-        plt.plot(data["name"], data["number_of_ingredients"], marker="o")
-        plt.xlabel("Recipes Names")
-        plt.ylabel("Number of Ingredients")
-        plt.xticks(rotation=45, ha="right")
-
-    else:
-        print("Unknown chart type")
-
-    # specifies layout details
-    plt.tight_layout()
-
-    # returns the graph to file
-    chart = get_graph()
+def render_chart(chart_type, data, fmt="png", **kwargs):
+    # imported on first render so workers and management commands boot without matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # matplotlib's text and font caches are shared, so one render at a time per process
+    with _render_lock:
+        # a standalone figure with its own Agg canvas, never registered with pyplot
+        fig = Figure(figsize=(6, 3))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+
+        try:
+            # determines layout of each chart_type
+            if chart_type == "#1":
+                # plots bar chart between recipe name on x-axis and cooking_time on y-axis
+                ax.bar(data["name"], data["cooking_time"])
+                ax.set_xlabel("Recipe Names")
+                ax.set_ylabel("Cooking Time (Minutes)")
+                ax.tick_params(axis="x", labelrotation=45)
+                for label in ax.get_xticklabels():
+                    label.set_horizontalalignment("right")
+
+            elif chart_type == "#2":
+                # generates pie chart based on difficulty with difficulties as labels
+                counts = Counter(data["difficulty"]).most_common()
+                labels = [difficulty for difficulty, _ in counts]
+                sizes = [count for _, count in counts]
+                ax.pie(sizes, labels=labels, autopct="%1.1f%%")
+
+            elif chart_type == "#3":
+                # plots line chart between recipe name on x-axis and number of ingredients on y-axis
+                ax.plot(data["name"], data["number_of_ingredients"], marker="o")
+                ax.set_xlabel("Recipes Names")
+                ax.set_ylabel("Number of Ingredients")
+                ax.tick_params(axis="x", labelrotation=45)
+                for label in ax.get_xticklabels():
+                    label.set_horizontalalignment("right")
+
+            else:
+                raise ValueError(f"Unknown chart type {chart_type!r}")
+
+            # specifies layout details
+            fig.tight_layout()
+
+            # returns the graph to file
+            chart = get_graph(fig, fmt)
+        finally:
+            # releases the artists explicitly instead of waiting for the garbage collector
+            fig.clear()
+
     return chart
@@ -1,4 +1,6 @@
-from django.shortcuts import render, redirect
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.shortcuts import redirect
 from django.views.generic import ListView, DetailView  # to display lists and details
 from .models import Recipe  # to access Recipe model
 from django.contrib.auth.mixins import LoginRequiredMixin  # to protect class-based view
@@ -6,16 +8,53 @@ from django.contrib.auth.decorators import (
     login_required,
 )  # to protect function-based views
 from .forms import RecipesSearchForm, AddRecipeForm
-import pandas as pd
-from .utils import get_chart
+from .utils import (
+    get_chart,
+    chart_fingerprint,
+    chart_payload,
+    get_view_cache,
+    recipe_detail_cache_key,
+    VIEW_CACHE_ALIAS,
+    VIEW_CACHE_TIMEOUT,
+)
+from .analytics import recipes_summary
+from .pagination import keyset_paginate
+from .stats import adashboard_statistics
+from .chart_pool import ChartPoolBusy, aget_chart, warm_charts
+from .exports import EXPORT_FORMATS, async_lines
+from .timing import TimedTemplateResponse, render
 from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    StreamingHttpResponse,
+)
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.cache import cache_page
+
+# chart names used in URLs, mapped to the chart types get_chart understands
+CHART_KINDS = {"bar": "#1", "pie": "#2", "line": "#3"}
+CHART_CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+# seconds the browser may reuse a chart before revalidating it with its ETag
+CHART_MAX_AGE = 300
+
+# above this many results, charts are drawn in the browser unless the search
+# asks for images: one bar per recipe makes large PNGs slow and unreadable
+CLIENT_CHART_THRESHOLD = 50
 
 
 # Create your views here.
+# static pages, served from the view cache without rendering
+@cache_page(VIEW_CACHE_TIMEOUT, cache=VIEW_CACHE_ALIAS)
 def home(request):
     return render(request, "recipes/home.html")
 
 
+@cache_page(VIEW_CACHE_TIMEOUT, cache=VIEW_CACHE_ALIAS)
 def about(request):
     return render(request, "recipes/about.html")
 
@@ -23,11 +62,55 @@ def about(request):
 class RecipeListView(LoginRequiredMixin, ListView):  # class-based "protected" view
     model = Recipe  # specify model
     template_name = "recipes/list.html"  # specify template
+    response_class = TimedTemplateResponse  # rendering shows up in Server-Timing
+    page_size = 20  # recipes per page
+    ordering = ("name", "id")  # unique ordering backed by recipe_name_id_idx
+
+    # fetches one page after or before the cursor, with only the columns the list shows
+    def get_queryset(self):
+        queryset = Recipe.objects.only(
+            "id", "name", "pic", "pic_thumbnail", "pic_medium", "pic_webp"
+        )
+        try:
+            self.page = keyset_paginate(
+                queryset,
+                self.ordering,
+                self.page_size,
+                after=self.request.GET.get("after"),
+                before=self.request.GET.get("before"),
+            )
+        except ValueError:
+            raise Http404("Invalid page cursor")
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["page"] = self.page
+        return context
 
 
 class RecipeDetailView(LoginRequiredMixin, DetailView):  # class-based "protected" view
     model = Recipe  # specify model
     template_name = "recipes/detail.html"  # specify template
+    response_class = TimedTemplateResponse  # rendering shows up in Server-Timing
+
+    # serves the page rendered for this user and recipe, skipping the query and
+    # the template; saving the recipe invalidates it, see recipes/signals.py
+    def get(self, request, *args, **kwargs):
+        pk = str(kwargs["pk"])
+        if not pk.isdigit():
+            return super().get(request, *args, **kwargs)
+
+        cache = get_view_cache()
+        key = recipe_detail_cache_key(pk, request.user.pk)
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content)
+
+        response = super().get(request, *args, **kwargs)
+        response.render()
+        cache.set(key, response.content, VIEW_CACHE_TIMEOUT)
+        return response
 
 
 @login_required  # function-based "protected" view
@@ -35,95 +118,181 @@ def search(request):
     # create an instance of RecipesSearchForm defined in recipes/forms.py
     form = RecipesSearchForm(request.POST or None)
 
-    # initialize dataframe to None
-    recipes_df = None
-
-    bar_chart = None
-    pie_chart = None
-    line_chart = None
-
-    if request.method == "POST" and form.is_valid():
-        # retrieves the search criteria from the form
-        search_by = form.cleaned_data.get("search_by")
-        search_term = form.cleaned_data.get("search_term")
-        cooking_time = form.cleaned_data.get("cooking_time")
-        difficulty = form.cleaned_data.get("difficulty")
-
-        # filters the queryset based on the form input
-        qs = Recipe.objects.all()
-
-        if search_by == "name" and search_term:
-            qs = qs.filter(name__icontains=search_term)
-        elif search_by == "cooking_time" and cooking_time is not None:
-            qs = qs.filter(cooking_time=cooking_time)
-        elif search_by == "difficulty" and difficulty:
-            qs = [recipe for recipe in qs if recipe.difficulty == difficulty]
-
-        # checks if the queryset is not empty
-        if qs:
-            # converts list to pandas dataframe, else converts queryset to pandas DataFrame
-            if isinstance(qs, list):
-                recipes_df = pd.DataFrame([recipe.__dict__ for recipe in qs])
-            else:
-                recipes_df = pd.DataFrame(qs.values())
-
-            recipes_df.index += 1
-
-            # retrieves each Recipe object using its id, then calls get_absolute_url() on it to generate the link
-            def format_recipe_name_table(row):
-                recipe = Recipe.objects.get(id=row["id"])
-                return f"<a href='{recipe.get_absolute_url()}'>{row['name']}</a>"
-
-            def format_recipe_name_chart(row):
-                return row["name"]
-
-            recipes_df["name_table"] = recipes_df.apply(
-                format_recipe_name_table, axis=1
-            )
-            recipes_df["name_chart"] = recipes_df.apply(
-                format_recipe_name_chart, axis=1
-            )
-
-            # calculates difficulty and number of ingredients for each recipe
-            recipes_df["difficulty"] = [recipe.difficulty for recipe in qs]
-            recipes_df["number_of_ingredients"] = recipes_df["ingredients"].apply(
-                lambda x: len(x.split(", "))
-            )
+    # initialize results to None
+    results = None
 
-            # generate charts
-            bar_chart = get_chart(
-                "#1", recipes_df, labels=recipes_df["name_chart"].values
-            )
-            pie_chart = get_chart(
-                "#2", recipes_df, labels=recipes_df["difficulty"].values
-            )
-            line_chart = get_chart(
-                "#3", recipes_df, labels=recipes_df["name_chart"].values
-            )
+    # query string the charts and exports use to repeat this search
+    search_query = None
 
-            recipes_df = recipes_df[["name_table", "cooking_time", "difficulty"]]
-            recipes_df = recipes_df.rename(columns={"name_table": "Name"})
-            recipes_df = recipes_df.rename(
-                columns={"cooking_time": "Cooking Time in Minutes"}
-            )
-            recipes_df.columns = recipes_df.columns.str.capitalize()
+    # "image" for server-rendered charts, "client" for a JSON payload drawn in the browser
+    chart_mode = None
+    chart_data_payload = None
 
-            # convert DataFrame to HTML for display
-            recipes_df = recipes_df.to_html(escape=False)
+    if request.method == "POST" and form.is_valid():
+        # filters the queryset based on the form input, reading the table and chart columns
+        rows = list(form.get_queryset().values_list("id", *CHART_FIELDS))
+        results = [
+            (id, name, cooking_time, difficulty)
+            for id, name, cooking_time, difficulty, _ in rows
+        ]
+
+        # the chart and export views repeat the search from this query string
+        search_query = form.get_query_string()
+
+        chart_mode = form.cleaned_data.get("chart_mode") or (
+            "client" if len(rows) > CLIENT_CHART_THRESHOLD else "image"
+        )
+        data = chart_data([row[1:] for row in rows])
+        if chart_mode == "client":
+            # serializing the columns is the only chart work left on the server
+            chart_data_payload = chart_payload(data)
+        elif rows:
+            # starts the three charts rendering in the chart pool without waiting,
+            # so the page's chart requests are likely to be cache hits
+            warm_charts(CHART_KINDS.values(), data)
 
     # pack up data to be sent to template in the context dictionary
     context = {
         "form": form,
-        "recipes_df": recipes_df,
-        "bar_chart": bar_chart,
-        "pie_chart": pie_chart,
-        "line_chart": line_chart,
+        "results": results,
+        "search_query": search_query,
+        "chart_mode": chart_mode,
+        "chart_data": chart_data_payload,
     }
 
     # loads page using "context" information
     return render(request, "recipes/search.html", context)
 
 
+# columns the charts plot, read straight from the search queryset
+CHART_FIELDS = ("name", "cooking_time", "difficulty", "number_of_ingredients")
+
+
+# turns (name, cooking_time, difficulty, number_of_ingredients) rows into columns
+def chart_data(rows):
+    columns = [list(column) for column in zip(*rows)] if rows else [[], [], [], []]
+    return dict(zip(CHART_FIELDS, columns))
+
+
+# unchanged data means an unchanged image, so the browser can revalidate
+def chart_etag(chart_type, data, fmt):
+    return f'"{chart_fingerprint(chart_type, data)}-{fmt}"'
+
+
+def finish_chart_response(response, etag):
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, max_age=CHART_MAX_AGE)
+    return response
+
+
+@login_required  # function-based "protected" view
+def chart(request, kind, fmt):
+    # the chart repeats the search described by the query string
+    form = RecipesSearchForm(request.GET)
+
+    if kind not in CHART_KINDS or fmt not in CHART_CONTENT_TYPES:
+        raise Http404("Unknown chart")
+    if not form.is_valid():
+        return HttpResponseBadRequest("Invalid search criteria")
+
+    chart_type = CHART_KINDS[kind]
+    data = chart_data(list(form.get_queryset().values_list(*CHART_FIELDS)))
+
+    etag = chart_etag(chart_type, data, fmt)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            get_chart(chart_type, data, fmt=fmt),
+            content_type=CHART_CONTENT_TYPES[fmt],
+        )
+    return finish_chart_response(response, etag)
+
+
+# login_required for async views, which it doesn't support in this Django version
+def async_login_required(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # loading the user touches the session and the database
+        if await sync_to_async(lambda: request.user.is_authenticated)():
+            return await view(request, *args, **kwargs)
+        return redirect_to_login(request.get_full_path())
+
+    return wrapper
+
+
+# async chart view for ASGI: rows come from the async ORM and renders run in the
+# chart process pool, so a slow chart never holds up the other requests
+@async_login_required
+async def chart_async(request, kind, fmt):
+    # the chart repeats the search described by the query string
+    form = RecipesSearchForm(request.GET)
+
+    if kind not in CHART_KINDS or fmt not in CHART_CONTENT_TYPES:
+        raise Http404("Unknown chart")
+    if not form.is_valid():
+        return HttpResponseBadRequest("Invalid search criteria")
+
+    chart_type = CHART_KINDS[kind]
+    queryset = form.get_queryset().values_list(*CHART_FIELDS)
+    data = chart_data([row async for row in queryset])
+
+    etag = chart_etag(chart_type, data, fmt)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        try:
+            image = await aget_chart(chart_type, data, fmt=fmt)
+        except ChartPoolBusy:
+            response = HttpResponse("Too many charts rendering", status=503)
+            response["Retry-After"] = "5"
+            return response
+        response = HttpResponse(image, content_type=CHART_CONTENT_TYPES[fmt])
+    return finish_chart_response(response, etag)
+
+
+@login_required  # function-based "protected" view
+def analytics_export(request):
+    # the export repeats the search described by the query string
+    form = RecipesSearchForm(request.GET)
+
+    if not form.is_valid():
+        return HttpResponseBadRequest("Invalid search criteria")
+
+    # summary statistics per difficulty, the only place pandas is needed
+    response = HttpResponse(content_type="text/csv")
+    response["Content-Disposition"] = 'attachment; filename="recipes_analytics.csv"'
+    recipes_summary(form.get_queryset()).to_csv(response)
+    return response
+
+
+@login_required  # function-based "protected" view
+def export(request, fmt):
+    # the export repeats the search described by the query string
+    form = RecipesSearchForm(request.GET)
+
+    if fmt not in EXPORT_FORMATS:
+        raise Http404("Unknown export format")
+    if not form.is_valid():
+        return HttpResponseBadRequest("Invalid search criteria")
+
+    # rows are written as they are fetched, so memory stays flat for any result
+    # size; under ASGI too, where a sync iterator would be read whole first
+    lines, content_type, extension = EXPORT_FORMATS[fmt]
+    content = lines(form.get_queryset())
+    if isinstance(request, ASGIRequest):
+        content = async_lines(content)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="recipes.{extension}"'
+    return response
+
+
+@async_login_required
+async def dashboard(request):
+    # reads the pre-aggregated counts, never the recipe table
+    context = {"statistics": await adashboard_statistics()}
+
+    return render(request, "recipes/dashboard.html", context)
+
+
 @login_required  # function-based "protected" view
 def add_recipe(request):
 